@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from image_client import (BackendError, CancellableRequest, build_request_body, load_records,
+                          percentile)
+
+# --- MULTI-BACKEND ROUTER ---
+# Spreads prompts.json records across several image backends (e.g. Nano Banana
+# Pro, Nano Banana 2, GPT Image) instead of pinning a run to one:
+#   - Latency-aware dispatch: each screen goes to the backend with the lowest
+#     score = p50 latency x error penalty x queue depth, from a sliding window
+#     of recent calls. Backends that haven't been called yet score 0 so they
+#     get explored; one that has only failed scores FAILED_LATENCY instead.
+#     A 429 benches the backend until its Retry-After expires, and a backend
+#     that failed a screen isn't retried for it while others remain.
+#   - Hedging: if the primary hasn't answered within its own p95, a duplicate
+#     goes to the next-best backend. The first success wins; the loser's socket
+#     is shut down (CancellableRequest.cancel()). If the loser had been running
+#     longer than the winner took, its elapsed time is kept as a lower bound
+#     (kept apart from real latencies) and score() uses max(p50, lower-bound
+#     p50), so a backend that always loses hedges still looks slow.
+#   - Tagging: every output PNG carries a 'Backend' tEXt chunk, and routing.json
+#     maps each record to its output file and backend.
+# Backend configs may embed a "simulator" object; with --simulate each backend
+# is replaced by an in-process backend_simulator.py server for offline testing.
+
+WINDOW = 50             # recent calls kept per backend
+MIN_SAMPLES = 5         # below this, hedge after --hedge-after seconds
+ERROR_PENALTY = 4.0     # score multiplier per unit of error rate
+FAILED_LATENCY = 600.0  # assumed p50 (seconds) of a backend with failures but no latency data
+
+
+class BackendStats:
+    """Sliding-window latency and error statistics for one backend."""
+
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+        self.latencies = deque(maxlen=WINDOW)
+        self.floors = deque(maxlen=WINDOW)  # lower bounds from lost hedges
+        self.outcomes = deque(maxlen=WINDOW)
+        self.inflight = 0
+        self.benched_until = 0.0
+        self.wins = 0
+        self.hedges = 0
+
+    @property
+    def error_rate(self):
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def p(self, pct):
+        return percentile(list(self.latencies), pct)
+
+    def floor(self):
+        return percentile(list(self.floors), 50)
+
+    def latency_estimate(self):
+        """p50 latency, raised to what lost hedges prove (None without data)."""
+        estimates = ([self.p(50)] if self.latencies else []) + ([self.floor()] if self.floors else [])
+        return max(estimates) if estimates else None
+
+    def score(self):
+        latency = self.latency_estimate()
+        if latency is None:
+            if not self.outcomes:
+                return 0.0
+            latency = FAILED_LATENCY
+        return latency * (1 + ERROR_PENALTY * self.error_rate) * (1 + self.inflight)
+
+
+class Router:
+    """Picks a backend per request and hedges slow ones."""
+
+    def __init__(self, backends, hedge_after=30.0, max_attempts=4, timeout=120.0):
+        self.backends = [BackendStats(b["name"], b["url"]) for b in backends]
+        self.hedge_after = hedge_after
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=8 * len(self.backends))
+
+    def pick(self, exclude=()):
+        """Best available backend not in exclude (None if there is none)."""
+        with self.lock:
+            now = time.monotonic()
+            ready = [b for b in self.backends if b not in exclude and b.benched_until <= now]
+            if not ready:
+                return None
+            best = min(ready, key=lambda b: b.score())
+            best.inflight += 1
+            return best
+
+    def _hedge_delay(self, backend):
+        with self.lock:
+            if len(backend.latencies) < MIN_SAMPLES:
+                return self.hedge_after
+            return backend.p(95)
+
+    def _attempt(self, backend, request):
+        start = time.monotonic()
+        try:
+            data = request.run()
+        except BackendError as e:
+            with self.lock:
+                backend.inflight -= 1
+                backend.outcomes.append(0)
+                if e.status == 429:
+                    backend.benched_until = time.monotonic() + (e.retry_after or 1.0)
+            raise
+        except OSError:
+            with self.lock:
+                backend.inflight -= 1
+                if not request.cancelled:
+                    backend.outcomes.append(0)
+            raise
+        with self.lock:
+            backend.inflight -= 1
+            backend.outcomes.append(1)
+            backend.latencies.append(time.monotonic() - start)
+        return data
+
+    def _launch(self, backend, body, running):
+        request = CancellableRequest(backend.url, body, self.timeout)
+        running[self.pool.submit(self._attempt, backend, request)] = (backend, request, time.monotonic())
+
+    def generate(self, body):
+        """Generate one image, hedging and failing over across backends.
+
+        Returns:
+            (image_bytes, backend_name, hedged)
+        """
+        hedged = False
+        last_error = None
+        failed = set()  # backends that already failed this screen
+        for _ in range(self.max_attempts):
+            if len(failed) == len(self.backends):
+                failed.clear()  # every backend failed once: start another round
+            primary = self.pick(exclude=failed)
+            if primary is None:
+                # Every remaining backend is benched by a 429: wait for the first to free up
+                with self.lock:
+                    wake = min(b.benched_until for b in self.backends if b not in failed)
+                time.sleep(max(0.0, wake - time.monotonic()))
+                continue
+            running = {}
+            self._launch(primary, body, running)
+            deadline = time.monotonic() + self._hedge_delay(primary)
+            while running:
+                timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Primary is slower than its p95: send a hedged duplicate
+                    deadline = None
+                    backup = self.pick(exclude=failed | {b for b, _, _ in running.values()})
+                    if backup is not None:
+                        hedged = True
+                        with self.lock:
+                            backup.hedges += 1
+                        self._launch(backup, body, running)
+                    continue
+                for future in done:
+                    backend, _, launched = running.pop(future)
+                    try:
+                        data = future.result()
+                    except (BackendError, OSError) as e:
+                        failed.add(backend)
+                        last_error = e
+                        continue
+                    now = time.monotonic()
+                    for _, request, _ in running.values():
+                        request.cancel()
+                    with self.lock:
+                        backend.wins += 1
+                        for loser, _, loser_launched in running.values():
+                            # A loser that had been running longer than the
+                            # winner needed would have taken at least that long
+                            if loser_launched < launched:
+                                loser.floors.append(now - loser_launched)
+                    return data, backend.name, hedged
+        raise last_error or OSError("no backend available")
+
+    def summary(self):
+        with self.lock:
+            return [{
+                "backend": b.name,
+                "wins": b.wins,
+                "hedges_sent": b.hedges,
+                "latency_p50": round(b.p(50), 3),
+                "latency_p95": round(b.p(95), 3),
+                "latency_floor": round(b.floor(), 3),
+                "error_rate": round(b.error_rate, 3),
+            } for b in self.backends]
+
+
+def tag_png(data, backend_name):
+    """Insert a 'Backend' tEXt chunk after IHDR (non-PNG data is returned as-is)."""
+    if not data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return data
+    text = b"Backend\x00" + backend_name.encode("latin-1", "replace")
+    chunk = struct.pack(">I", len(text)) + b"tEXt" + text + struct.pack(">I", zlib.crc32(b"tEXt" + text))
+    ihdr_end = 8 + 8 + 13 + 4
+    return data[:ihdr_end] + chunk + data[ihdr_end:]
+
+
+def start_simulators(backends):
+    """Start an in-process backend_simulator.py server per backend; rewrite urls."""
+    from backend_simulator import make_server
+
+    servers = []
+    for b in backends:
+        server = make_server(port=0, config=b.get("simulator"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        b["url"] = f"http://{host}:{port}"
+        servers.append(server)
+    return servers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Route prompts.json records across image backends with hedging")
+    parser.add_argument("--backends", required=True,
+                        help="JSON list of backends: [{\"name\": ..., \"url\": ..., \"simulator\": {...}?}]")
+    parser.add_argument("--prompts", nargs="+", required=True,
+                        help="prompts.json / mockup_prompts.json / pipeline_prompts.json files")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Screens generated at once (default: 1)")
+    parser.add_argument("--hedge-after", type=float, default=30.0,
+                        help="Hedge delay in seconds until a backend has enough samples for its own p95 (default: 30)")
+    parser.add_argument("--max-attempts", type=int, default=4,
+                        help="Dispatch rounds per screen before giving up (default: 4)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Per-request timeout in seconds (default: 120)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Replace every backend with a local simulator using its 'simulator' config")
+    parser.add_argument("--output-dir", default=".screenshot-gen-tmp/routed",
+                        help="Where images and routing.json are written (default: .screenshot-gen-tmp/routed)")
+
+    args = parser.parse_args()
+
+    with open(args.backends) as f:
+        backends = json.load(f)
+    servers = start_simulators(backends) if args.simulate else []
+
+    jobs = []
+    for path in args.prompts:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for n, record in enumerate(load_records(path), 1):
+            jobs.append((f"{stem}_{n:03d}", record))
+
+    router = Router(backends, args.hedge_after, args.max_attempts, args.timeout)
+    os.makedirs(args.output_dir, exist_ok=True)
+    routing = []
+    lock = threading.Lock()
+
+    def run(job):
+        job_id, record = job
+        start = time.monotonic()
+        entry = {"id": job_id, "index": record.get("index"), "output_file": None,
+                 "backend": None, "hedged": False, "error": None}
+        try:
+            data, entry["backend"], entry["hedged"] = router.generate(build_request_body(record))
+            entry["output_file"] = os.path.join(args.output_dir, f"{job_id}.png")
+            with open(entry["output_file"], "wb") as out:
+                out.write(tag_png(data, entry["backend"]))
+        except (BackendError, OSError) as e:
+            entry["error"] = str(e)
+        entry["latency"] = round(time.monotonic() - start, 3)
+        with lock:
+            routing.append(entry)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, jobs))
+    wall = time.monotonic() - start
+    routing.sort(key=lambda e: e["id"])
+
+    latencies = [e["latency"] for e in routing if not e["error"]]
+    report = {
+        "screens": len(routing),
+        "failed": sum(1 for e in routing if e["error"]),
+        "hedged": sum(1 for e in routing if e["hedged"]),
+        "wall_seconds": round(wall, 3),
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "latency_p99": round(percentile(latencies, 99), 3),
+        "backends": router.summary(),
+    }
+    routing_path = os.path.join(args.output_dir, "routing.json")
+    with open(routing_path, "w") as f:
+        json.dump({"report": report, "records": routing}, f, indent=2)
+
+    print(f"\nRouted {report['screens']} screens in {report['wall_seconds']}s "
+          f"({report['hedged']} hedged, {report['failed']} failed) → {routing_path}")
+    print(f"latency p50={report['latency_p50']}s p95={report['latency_p95']}s p99={report['latency_p99']}s\n")
+    header = f"{'Backend':<22} {'Wins':>5} {'Hedges':>7} {'p50':>8} {'p95':>8} {'Errors':>7}"
+    sep = '-' * len(header)
+    print(sep)
+    print(header)
+    print(sep)
+    for b in report["backends"]:
+        print(f"{b['backend']:<22} {b['wins']:>5} {b['hedges_sent']:>7} {b['latency_p50']:>8} "
+              f"{b['latency_p95']:>8} {b['error_rate']:>7.0%}")
+    print(sep)
+    print()
+
+    router.pool.shutdown(wait=False)
+    for server in servers:
+        server.shutdown()
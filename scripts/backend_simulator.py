@@ -0,0 +1,287 @@
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from image_client import GENERATE_PATH
+
+# --- LOCAL IMAGE-BACKEND SIMULATOR ---
+# A stand-in for the image-generation endpoint so concurrency, retry and
+# throughput behavior can be measured offline without spending API quota.
+#
+#   POST /v1/images/generate  {"prompt", "resolution", "reference_image"?}
+#     -> 200 image/png placeholder sized to `resolution`
+#     -> 429 + Retry-After when rate-limited or inside a 429 burst
+#     -> 500 at the configured error rate
+#   GET  /healthz             -> 200 {"requests": ..., "by_status": {...}}
+#                                (499 = client disconnected before the reply)
+#
+# With --batch it instead processes a batch_jobs.py export offline, standing in
+# for a provider's asynchronous batch endpoint.
+#
+# Latency is drawn from a lognormal distribution (median + sigma), matching the
+# long right tail real image backends show. --time-scale shrinks every delay
+# (latency, burst length, Retry-After) so load tests run in seconds.
+
+DEFAULT_CONFIG = {
+    "latency_median": 12.0,  # seconds
+    "latency_sigma": 0.4,    # lognormal shape; p95 ~= median * e^(1.645 * sigma)
+    "rpm": 10,               # rate limit, requests per minute (0 = unlimited)
+    "burst_429_rate": 0.0,   # chance per request of starting a 429 burst
+    "burst_seconds": 30.0,   # how long a 429 burst lasts
+    "error_rate": 0.0,       # chance per request of a 500
+    "time_scale": 1.0,       # multiplier applied to every delay
+    "seed": None,
+}
+
+
+def placeholder_png(width, height, color):
+    """Encode a solid-color RGB PNG with the stdlib (no Pillow needed)."""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    row = b"\x00" + bytes(color) * width
+    raw = row * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+class SimulatedBackend:
+    """Shared state for one simulated backend: rate limiter, bursts, counters."""
+
+    def __init__(self, config=None):
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.tokens = float(self.config["rpm"])
+        self.last_refill = time.monotonic()
+        self.burst_until = 0.0
+        self.by_status = {}
+        self._png_cache = {}
+
+    def _scaled(self, seconds):
+        return seconds * self.config["time_scale"]
+
+    def admit(self):
+        """Decide the fate of an incoming request.
+
+        Returns (status, retry_after_seconds). Rate limiting is a token bucket
+        refilled continuously at rpm/60 tokens per (scaled) second.
+        """
+        cfg = self.config
+        with self.lock:
+            now = time.monotonic()
+            if now < self.burst_until:
+                return 429, self.burst_until - now
+            if cfg["burst_429_rate"] and self.rng.random() < cfg["burst_429_rate"]:
+                self.burst_until = now + self._scaled(cfg["burst_seconds"])
+                return 429, self.burst_until - now
+            if cfg["rpm"]:
+                refill_per_sec = cfg["rpm"] / self._scaled(60.0)
+                self.tokens = min(cfg["rpm"], self.tokens + (now - self.last_refill) * refill_per_sec)
+                self.last_refill = now
+                if self.tokens < 1:
+                    return 429, (1 - self.tokens) / refill_per_sec
+                self.tokens -= 1
+            if cfg["error_rate"] and self.rng.random() < cfg["error_rate"]:
+                return 500, None
+            return 200, None
+
+    def sample_latency(self):
+        cfg = self.config
+        with self.lock:
+            latency = self.rng.lognormvariate(math.log(cfg["latency_median"]), cfg["latency_sigma"])
+        return self._scaled(latency)
+
+    def render(self, prompt, resolution):
+        """Return a placeholder PNG sized to 'WxH', colored by prompt hash."""
+        width, height = (int(v) for v in resolution.lower().split("x"))
+        color = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+        key = (width, height, color)
+        with self.lock:
+            png = self._png_cache.get(key)
+        if png is None:
+            png = placeholder_png(width, height, color)
+            with self.lock:
+                self._png_cache[key] = png
+        return png
+
+    def count(self, status):
+        with self.lock:
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+
+
+def make_handler(backend):
+    """Build a request handler class bound to a SimulatedBackend."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status, body, content_type="application/json", headers=None):
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away (e.g. a cancelled hedged request):
+                # 499 "client closed request", as nginx logs it.
+                status = 499
+                self.close_connection = True
+            backend.count(status)
+
+        def _error(self, status, message, headers=None):
+            self._reply(status, json.dumps({"error": message}).encode("utf-8"), headers=headers)
+
+        def do_GET(self):
+            if self.path != "/healthz":
+                return self._error(404, "not found")
+            with backend.lock:
+                stats = {"requests": sum(backend.by_status.values()),
+                         "by_status": {str(k): v for k, v in backend.by_status.items()}}
+            self._reply(200, json.dumps(stats).encode("utf-8"))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length)
+            if self.path != GENERATE_PATH:
+                return self._error(404, "not found")
+            try:
+                body = json.loads(raw)
+                prompt = body["prompt"]
+                resolution = body.get("resolution", "1080x1920")
+                png = backend.render(prompt, resolution)
+            except (ValueError, KeyError) as e:
+                return self._error(400, f"bad request: {e}")
+
+            status, retry_after = backend.admit()
+            if status == 429:
+                return self._error(429, "rate limited", {"Retry-After": f"{retry_after:.3f}"})
+            latency = backend.sample_latency()
+            time.sleep(latency)
+            if status == 500:
+                return self._error(500, "internal error")
+            self._reply(200, png, "image/png", {"X-Simulated-Latency": f"{latency:.3f}"})
+
+    return Handler
+
+
+def make_server(host="127.0.0.1", port=8765, config=None):
+    """Create (but do not start) a threaded simulator server.
+
+    Use port=0 to bind a free port; the bound address is server.server_address.
+    """
+    backend = SimulatedBackend(config)
+    server = ThreadingHTTPServer((host, port), make_handler(backend))
+    server.daemon_threads = True
+    server.backend = backend
+    return server
+
+
+def process_batch(batch_path, uploads_path, results_path, config=None):
+    """Process a batch_jobs.py batch.jsonl offline, like a provider batch endpoint.
+
+    Each request must reference only images listed in uploads.json. Failures
+    follow --error-rate, and results are written in shuffled order (providers
+    don't preserve input order) as {"custom_id", "response"} or
+    {"custom_id", "error"} lines.
+
+    Returns:
+        (succeeded, failed)
+    """
+    backend = SimulatedBackend(config)
+    with open(uploads_path) as f:
+        uploads = json.load(f)
+    with open(batch_path) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    backend.rng.shuffle(requests)
+
+    succeeded = failed = 0
+    with open(results_path, "w") as out:
+        for req in requests:
+            body = req["body"]
+            ref = body.get("reference_image_sha256")
+            if ref and ref not in uploads:
+                result = {"custom_id": req["custom_id"],
+                          "error": {"code": "invalid_file", "message": f"reference {ref[:12]} not uploaded"}}
+            elif backend.config["error_rate"] and backend.rng.random() < backend.config["error_rate"]:
+                result = {"custom_id": req["custom_id"],
+                          "error": {"code": "server_error", "message": "internal error"}}
+            else:
+                png = backend.render(body["prompt"], body.get("resolution", "1080x1920"))
+                result = {"custom_id": req["custom_id"],
+                          "response": {"status_code": 200,
+                                       "body": {"image_b64": base64.b64encode(png).decode("ascii")}}}
+            failed += "error" in result
+            succeeded += "error" not in result
+            out.write(json.dumps(result) + "\n")
+    return succeeded, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local image-backend simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Bind port (default: 8765)")
+    parser.add_argument("--latency-median", type=float, default=DEFAULT_CONFIG["latency_median"],
+                        help="Median generation latency in seconds (default: 12.0)")
+    parser.add_argument("--latency-sigma", type=float, default=DEFAULT_CONFIG["latency_sigma"],
+                        help="Lognormal sigma of the latency distribution (default: 0.4)")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_CONFIG["rpm"],
+                        help="Rate limit in requests per minute, 0 to disable (default: 10)")
+    parser.add_argument("--burst-429-rate", type=float, default=DEFAULT_CONFIG["burst_429_rate"],
+                        help="Probability per request of starting a 429 burst (default: 0)")
+    parser.add_argument("--burst-seconds", type=float, default=DEFAULT_CONFIG["burst_seconds"],
+                        help="Length of a 429 burst in seconds (default: 30)")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"],
+                        help="Probability per request of a 500 error (default: 0)")
+    parser.add_argument("--time-scale", type=float, default=DEFAULT_CONFIG["time_scale"],
+                        help="Multiply every delay by this factor, e.g. 0.01 (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--batch", default=None,
+                        help="Process a batch_jobs.py batch.jsonl offline instead of serving HTTP")
+    parser.add_argument("--uploads", default=None,
+                        help="uploads.json for --batch (default: next to the batch file)")
+    parser.add_argument("--results", default=None,
+                        help="Results JSONL for --batch (default: results.jsonl next to the batch file)")
+
+    args = parser.parse_args()
+    config = {k: getattr(args, k) for k in DEFAULT_CONFIG}
+
+    if args.batch:
+        batch_dir = os.path.dirname(args.batch)
+        uploads = args.uploads or os.path.join(batch_dir, "uploads.json")
+        results = args.results or os.path.join(batch_dir, "results.jsonl")
+        ok, failed = process_batch(args.batch, uploads, results, config)
+        print(f"\nProcessed batch: {ok} succeeded, {failed} failed → {results}\n")
+        raise SystemExit(0)
+    server = make_server(args.host, args.port, config)
+
+    host, port = server.server_address[:2]
+    print(f"\nSimulated image backend on http://{host}:{port}{GENERATE_PATH}")
+    print(f"latency median={args.latency_median}s sigma={args.latency_sigma} | rpm={args.rpm} | "
+          f"429 bursts={args.burst_429_rate} x {args.burst_seconds}s | errors={args.error_rate} | "
+          f"time scale={args.time_scale}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
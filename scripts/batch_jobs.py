@@ -0,0 +1,231 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+
+from image_client import GENERATE_PATH, load_records
+
+# --- OFFLINE BATCH JOBS ---
+# Catalog-scale runs are cheaper and faster through a provider's asynchronous
+# batch endpoint than through one synchronous call per image.
+#
+#   export: prompts.json files -> batch.jsonl + uploads.json + batch_index.json
+#     batch.jsonl     one request per line: {"custom_id", "method", "url", "body"}
+#                     custom_id = <source>-<nnn>-<content hash>, stable across re-exports;
+#                     <source> = parent dir + file stem + hash of the file's absolute
+#                     path, so app1/.screenshot-gen-tmp/prompts.json and
+#                     app2/.screenshot-gen-tmp/prompts.json never collide
+#     uploads.json    reference images keyed by SHA-256 of their bytes, so a
+#                     screenshot shared across locales/devices is uploaded ONCE
+#     batch_index.json custom_id -> prompts file, record index, output file
+#   import: results.jsonl -> images at their output files + batch_import.json,
+#           and retry_batch.jsonl with the requests that failed or are missing.
+#           batch_import.json records which custom_id wrote each file, so a
+#           request missing from a later results file (a retry batch) counts as
+#           done only if that same custom_id wrote its output — never because a
+#           stale image from an earlier export sits at the same path.
+#
+# Records whose reference image does not exist yet (marketing stages of a
+# pipeline_prompts.json before its mockups are generated) are skipped; export
+# again after importing the mockup results.
+#
+# backend_simulator.py --batch processes a batch.jsonl locally for testing.
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "prompts"
+
+
+def source_name(path):
+    """Readable, per-file unique prefix for custom_ids and default output paths."""
+    path = os.path.abspath(path)
+    parent = os.path.basename(os.path.dirname(path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{_slug(f'{parent}_{stem}')}_{hashlib.sha256(path.encode('utf-8')).hexdigest()[:8]}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_batch(prompt_paths, output_dir, image_dir, skip_existing=False):
+    """Turn prompts files into batch requests, an upload manifest and an index.
+
+    With skip_existing, records whose output file already exists are left out
+    (e.g. re-exporting a pipeline after its mockups were imported).
+
+    Raises ValueError if two requests would share a custom_id or output file.
+
+    Returns:
+        (requests, uploads, index, skipped)
+    """
+    requests, index, skipped = [], {}, []
+    uploads = {}
+    hash_cache = {}
+    outputs = {}
+
+    for path in prompt_paths:
+        source = source_name(path)
+        for n, record in enumerate(load_records(path), 1):
+            output_file = record.get("output_file") or os.path.join(
+                image_dir, source, f"{source}_{record.get('index', n):02d}.png")
+            if skip_existing and os.path.isfile(output_file):
+                continue
+            body = {"prompt": record["prompt"], "resolution": record.get("resolution", "1080x1920")}
+            input_file = record.get("input_file")
+            if input_file and not record.get("screen_key"):
+                if not os.path.isfile(input_file):
+                    skipped.append({"prompts_file": path, "index": record.get("index"),
+                                    "reason": f"reference image not found: {input_file}"})
+                    continue
+                real = os.path.realpath(input_file)
+                if real not in hash_cache:
+                    hash_cache[real] = file_sha256(real)
+                sha = hash_cache[real]
+                entry = uploads.setdefault(sha, {"path": real, "bytes": os.path.getsize(real), "used_by": 0})
+                entry["used_by"] += 1
+                body["reference_image_sha256"] = sha
+
+            content = json.dumps(body, sort_keys=True).encode("utf-8")
+            custom_id = f"{source}-{n:03d}-{hashlib.sha256(content).hexdigest()[:12]}"
+            if custom_id in index:
+                raise ValueError(f"duplicate custom_id {custom_id} ({path} listed twice?)")
+            real_output = os.path.realpath(output_file)
+            if real_output in outputs:
+                raise ValueError(f"{path} #{record.get('index')} and {outputs[real_output]} "
+                                 f"would both write {output_file}")
+            outputs[real_output] = f"{path} #{record.get('index')}"
+            requests.append({"custom_id": custom_id, "method": "POST", "url": GENERATE_PATH, "body": body})
+            index[custom_id] = {"prompts_file": path, "record": n, "index": record.get("index"),
+                                "role": record.get("role"), "output_file": output_file}
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "batch.jsonl"), "w") as f:
+        for req in requests:
+            f.write(json.dumps(req) + "\n")
+    with open(os.path.join(output_dir, "uploads.json"), "w") as f:
+        json.dump(uploads, f, indent=2)
+    with open(os.path.join(output_dir, "batch_index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    return requests, uploads, index, skipped
+
+
+def import_results(results_path, batch_dir):
+    """Write batch results to their output files and collect failures.
+
+    Results lines look like {"custom_id", "response": {"status_code", "body":
+    {"image_b64"}}} or {"custom_id", "error": {...}}, in any order.
+
+    Returns:
+        List of per-request status dicts, in batch_index.json order.
+    """
+    with open(os.path.join(batch_dir, "batch_index.json")) as f:
+        index = json.load(f)
+    status_path = os.path.join(batch_dir, "batch_import.json")
+    imported = {}  # custom_id -> output file it wrote, from earlier imports
+    if os.path.isfile(status_path):
+        with open(status_path) as f:
+            imported = {s["custom_id"]: s["output_file"] for s in json.load(f) if s["ok"]}
+
+    results = {}
+    with open(results_path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                results[item["custom_id"]] = item
+
+    statuses = []
+    for custom_id, target in index.items():
+        status = dict(target, custom_id=custom_id, ok=False, error=None)
+        item = results.get(custom_id)
+        response = (item or {}).get("response") or {}
+        if (item is None and imported.get(custom_id) == target["output_file"]
+                and os.path.isfile(target["output_file"])):
+            # Not in this results file (e.g. importing a retry batch) but
+            # this same request was imported from an earlier one.
+            status["ok"] = True
+        elif item is None:
+            status["error"] = "missing from results"
+        elif item.get("error") or response.get("status_code", 200) >= 300:
+            status["error"] = json.dumps(item.get("error") or response.get("body"))[:200]
+        else:
+            data = base64.b64decode(response["body"]["image_b64"])
+            os.makedirs(os.path.dirname(target["output_file"]) or ".", exist_ok=True)
+            with open(target["output_file"], "wb") as out:
+                out.write(data)
+            status["ok"] = True
+        statuses.append(status)
+
+    failed = {s["custom_id"] for s in statuses if not s["ok"]}
+    with open(os.path.join(batch_dir, "batch.jsonl")) as f, \
+            open(os.path.join(batch_dir, "retry_batch.jsonl"), "w") as retry:
+        for line in f:
+            if line.strip() and json.loads(line)["custom_id"] in failed:
+                retry.write(line)
+    with open(status_path, "w") as f:
+        json.dump(statuses, f, indent=2)
+    return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export prompts.json files to provider batch jobs, and import results")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Build batch.jsonl, uploads.json and batch_index.json")
+    exp.add_argument("--prompts", nargs="+", required=True,
+                     help="prompts.json / mockup_prompts.json / pipeline_prompts.json files")
+    exp.add_argument("--batch-dir", default=".screenshot-gen-tmp/batch",
+                     help="Where the batch files are written (default: .screenshot-gen-tmp/batch)")
+    exp.add_argument("--image-dir", default="screenshots",
+                     help="Base directory for imported images of records without an output_file "
+                          "(default: screenshots)")
+    exp.add_argument("--skip-existing", action="store_true",
+                     help="Leave out records whose output file already exists")
+
+    imp = sub.add_parser("import", help="Map batch results back to records and output files")
+    imp.add_argument("--results", required=True, help="Provider results JSONL")
+    imp.add_argument("--batch-dir", default=".screenshot-gen-tmp/batch",
+                     help="Directory holding batch.jsonl and batch_index.json (default: .screenshot-gen-tmp/batch)")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            requests, uploads, index, skipped = export_batch(args.prompts, args.batch_dir, args.image_dir,
+                                                                args.skip_existing)
+        except ValueError as e:
+            sys.exit(f"Export failed: {e}")
+        refs = sum(u["used_by"] for u in uploads.values())
+        print(f"\nExported {len(requests)} requests → {os.path.join(args.batch_dir, 'batch.jsonl')}")
+        print(f"Reference images: {refs} references, {len(uploads)} unique uploads "
+              f"({sum(u['bytes'] for u in uploads.values()) / 1e6:.1f} MB) → "
+              f"{os.path.join(args.batch_dir, 'uploads.json')}")
+        for s in skipped:
+            print(f"skipped {s['prompts_file']} #{s['index']}: {s['reason']}")
+        print()
+    else:
+        statuses = import_results(args.results, args.batch_dir)
+        ok = sum(s["ok"] for s in statuses)
+        print(f"\nImported {ok}/{len(statuses)} images → {os.path.join(args.batch_dir, 'batch_import.json')}\n")
+        idx_w = max(24, max(len(s["custom_id"]) for s in statuses) + 2) if statuses else 24
+        header = f"{'Custom ID':<{idx_w}} {'Index':<6} {'Result'}"
+        sep = '-' * (len(header) + 30)
+        print(sep)
+        print(header)
+        print(sep)
+        for s in statuses:
+            result = s["output_file"] if s["ok"] else f"FAILED: {s['error']}"
+            print(f"{s['custom_id']:<{idx_w}} {str(s['index']):<6} {result}")
+        print(sep)
+        if ok < len(statuses):
+            print(f"{len(statuses) - ok} failed → resubmit {os.path.join(args.batch_dir, 'retry_batch.jsonl')}")
+        print()
+        if ok < len(statuses):
+            sys.exit(1)
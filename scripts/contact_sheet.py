@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    sys.exit("contact_sheet.py requires Pillow: pip install Pillow")
+
+# --- CONTACT SHEET PREVIEW ---
+# Approval steps (style approval, "regenerate any screen that breaks the visual
+# flow") used to load every full-resolution 1320x2868 image into the
+# conversation. This renders the whole sequence as ONE small JPEG instead:
+# thumbnails in prompts.json index order, each labeled with role + headline.
+#
+# Speed comes from never decoding at full size:
+#   1. Image.draft() asks the JPEG decoder for a DCT-scaled (1/2, 1/4, 1/8)
+#      decode close to the thumbnail size. No-op for PNG/WebP.
+#   2. thumbnail(reducing_gap=...) does a cheap integer reduce() first and
+#      only resamples the last step.
+
+LABEL_HEIGHT = 34
+PADDING = 12
+BACKGROUND = (24, 24, 28)
+LABEL_COLOR = (235, 235, 240)
+SUBLABEL_COLOR = (150, 150, 160)
+
+
+def load_records(prompts_path):
+    """Load prompt records from prompts.json or pipeline_prompts.json.
+
+    Pipeline stages are unwrapped to their 'marketing' record, since that is
+    the image shown for approval.
+    """
+    with open(prompts_path) as f:
+        records = json.load(f)
+    records = [r.get("marketing", r) for r in records]
+    return sorted(records, key=lambda r: r["index"])
+
+
+def load_thumbnail(path, thumb_size):
+    """Decode an image at reduced size and fit it inside thumb_size."""
+    with Image.open(path) as im:
+        im.draft("RGB", thumb_size)
+        im = im.convert("RGB")
+        im.thumbnail(thumb_size, Image.BILINEAR, reducing_gap=2.0)
+        return im
+
+
+def _fit_text(draw, text, font, max_width):
+    """Truncate text with an ellipsis so it fits max_width pixels."""
+    if draw.textlength(text, font=font) <= max_width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > max_width:
+        text = text[:-1]
+    return text + "..."
+
+
+def build_contact_sheet(records, image_paths, thumb_width=180, columns=5):
+    """Build a single contact-sheet image for a screenshot sequence.
+
+    Args:
+        records: Prompt dicts (sorted by index) with 'index', 'role', 'headline'.
+        image_paths: Generated image paths, one per record, in the same order.
+        thumb_width: Width of each thumbnail in pixels.
+        columns: Maximum thumbnails per row.
+
+    Returns:
+        A PIL RGB image.
+    """
+    if len(records) != len(image_paths):
+        raise ValueError(f"{len(image_paths)} images provided for {len(records)} prompts")
+
+    # Thumbnail cell height follows the tallest aspect ratio in the set
+    # (all images in a sequence normally share one resolution).
+    thumb_height = thumb_width
+    for r in records:
+        w, h = (int(v) for v in r.get("resolution", "1080x1920").split("x"))
+        thumb_height = max(thumb_height, int(thumb_width * h / w))
+    thumb_size = (thumb_width, thumb_height)
+
+    columns = max(1, min(columns, len(records)))
+    rows = (len(records) + columns - 1) // columns
+    cell_w = thumb_width + PADDING
+    cell_h = thumb_height + LABEL_HEIGHT + PADDING
+    sheet = Image.new("RGB", (columns * cell_w + PADDING, rows * cell_h + PADDING), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    font = ImageFont.load_default()
+
+    for n, (record, path) in enumerate(zip(records, image_paths)):
+        x = PADDING + (n % columns) * cell_w
+        y = PADDING + (n // columns) * cell_h
+        thumb = load_thumbnail(path, thumb_size)
+        # Center the thumbnail inside its cell
+        sheet.paste(thumb, (x + (thumb_width - thumb.width) // 2,
+                            y + (thumb_height - thumb.height) // 2))
+
+        title = f"#{record['index']} {record.get('role', '')}".strip()
+        draw.text((x, y + thumb_height + 4), _fit_text(draw, title, font, thumb_width),
+                  fill=LABEL_COLOR, font=font)
+        draw.text((x, y + thumb_height + 18), _fit_text(draw, record.get("headline", ""), font, thumb_width),
+                  fill=SUBLABEL_COLOR, font=font)
+
+    return sheet
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a low-resolution contact sheet for approval")
+    parser.add_argument("--prompts", required=True,
+                        help="prompts.json (or pipeline_prompts.json) the images were generated from")
+    parser.add_argument("--images", nargs="+", required=True,
+                        help="Generated image paths, in prompts.json index order")
+    parser.add_argument("--thumb-width", type=int, default=180,
+                        help="Thumbnail width in pixels (default: 180)")
+    parser.add_argument("--columns", type=int, default=5,
+                        help="Maximum thumbnails per row (default: 5)")
+    parser.add_argument("--output", default=".screenshot-gen-tmp/contact_sheet.jpg",
+                        help="Output JPEG path (default: .screenshot-gen-tmp/contact_sheet.jpg)")
+
+    args = parser.parse_args()
+
+    records = load_records(args.prompts)
+    start = time.perf_counter()
+    sheet = build_contact_sheet(records, args.images, args.thumb_width, args.columns)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    sheet.save(args.output, "JPEG", quality=80, optimize=True)
+
+    print(f"\nContact sheet ({len(records)} screens, {sheet.width}x{sheet.height}) → {args.output}")
+    print(f"Rendered in {elapsed * 1000:.0f} ms ({elapsed * 1000 / len(records):.1f} ms per image)\n")
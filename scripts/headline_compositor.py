@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import sys
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageStat
+except ImportError:
+    sys.exit("headline_compositor.py requires Pillow: pip install Pillow")
+
+# --- LOCAL HEADLINE COMPOSITING ---
+# Pairs with `prompt_generator.py --headline-mode composited`, which asks the
+# model for text-free scenes with an empty headline zone (record["headline_zone"]).
+# Headlines are drawn here with real font metrics instead of being baked in:
+#   - ONE font size is chosen for the whole sequence: the largest size at which
+#     every headline fits its zone within --max-lines. Typography is therefore
+#     identical on every screen.
+#   - ONE color is chosen for the sequence (auto: light or dark text, from the
+#     average luminance of all headline zones).
+#   - Localizing is a re-render per locale, not a regeneration per locale.
+
+DEFAULT_FONTS = ["DejaVuSans-Bold.ttf", "Arial Bold.ttf", "Helvetica.ttc"]
+LINE_SPACING = 1.15
+FILL_RATIO = 0.8  # fraction of the zone height text may occupy
+MIN_FONT_SIZE = 8
+
+
+def load_font_factory(font_path=None):
+    """Return a callable size -> FreeTypeFont for font_path (or a system default)."""
+    candidates = [font_path] if font_path else DEFAULT_FONTS
+    for candidate in candidates:
+        try:
+            ImageFont.truetype(candidate, 12)
+        except OSError:
+            continue
+        return lambda size, path=candidate: ImageFont.truetype(path, size)
+    sys.exit(f"Could not load a TrueType font (tried: {', '.join(candidates)}). Pass --font /path/to/font.ttf")
+
+
+def wrap_text(text, font, max_width):
+    """Greedy word wrap using real glyph advances."""
+    lines = []
+    current = ""
+    for word in text.split():
+        trial = f"{current} {word}".strip()
+        if current and font.getlength(trial) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = trial
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _fits(headline, font, size, box_w, box_h, max_lines):
+    lines = wrap_text(headline, font, box_w)
+    if len(lines) > max_lines:
+        return False
+    if any(font.getlength(line) > box_w for line in lines):
+        return False
+    return len(lines) * size * LINE_SPACING <= box_h
+
+
+def fit_font_size(headlines, font_factory, box_w, box_h, max_lines=2):
+    """Largest font size at which EVERY headline fits a box_w x box_h zone.
+
+    Binary search over integer sizes; fitting is monotonic in size.
+    """
+    lo, hi = MIN_FONT_SIZE, max(MIN_FONT_SIZE, int(box_h))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        font = font_factory(mid)
+        if all(_fits(h, font, mid, box_w, box_h, max_lines) for h in headlines):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def zone_box(image, record, margin=0.06):
+    """Return (left, top, right, bottom) of the usable headline zone in pixels."""
+    zone = record.get("headline_zone") or {"position": "top", "height_ratio": 0.22}
+    zone_h = int(image.height * zone["height_ratio"])
+    top = 0 if zone["position"] == "top" else image.height - zone_h
+    pad_x = int(image.width * margin)
+    return pad_x, top, image.width - pad_x, top + zone_h
+
+
+def auto_text_color(images, records):
+    """Pick white or near-black text from the mean luminance of all headline zones."""
+    total = 0.0
+    for image, record in zip(images, records):
+        zone = image.crop(zone_box(image, record, margin=0)).convert("L").reduce(8)
+        total += ImageStat.Stat(zone).mean[0]
+    return (20, 20, 24) if total / len(images) > 150 else (255, 255, 255)
+
+
+def composite_headlines(images, records, headlines, font_factory, color=None, max_lines=2):
+    """Draw headlines onto copies of the scene images with one shared font size.
+
+    Returns:
+        (composited_images, font_size)
+    """
+    boxes = [zone_box(im, r) for im, r in zip(images, records)]
+    box_w = min(b[2] - b[0] for b in boxes)
+    box_h = min(b[3] - b[1] for b in boxes) * FILL_RATIO
+    size = fit_font_size(headlines, font_factory, box_w, box_h, max_lines)
+    font = font_factory(size)
+    color = color or auto_text_color(images, records)
+
+    out = []
+    for image, (left, top, right, bottom), headline in zip(images, boxes, headlines):
+        canvas = image.convert("RGB")
+        draw = ImageDraw.Draw(canvas)
+        lines = wrap_text(headline, font, box_w)
+        line_h = size * LINE_SPACING
+        y = top + ((bottom - top) - len(lines) * line_h) / 2
+        for line in lines:
+            x = left + ((right - left) - font.getlength(line)) / 2
+            draw.text((x, y), line, font=font, fill=color)
+            y += line_h
+        out.append(canvas)
+    return out, size
+
+
+def _parse_color(value):
+    if value == "auto":
+        return None
+    value = value.lstrip("#")
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Composite headlines onto text-free scenes")
+    parser.add_argument("--prompts", required=True,
+                        help="prompts.json generated with --headline-mode composited")
+    parser.add_argument("--images", nargs="+", required=True,
+                        help="Generated text-free scene images, in prompts.json index order")
+    parser.add_argument("--locales", default=None,
+                        help="Optional JSON file mapping locale -> list of headlines (one per screen). "
+                             "Without it, the headlines from prompts.json are used.")
+    parser.add_argument("--font", default=None,
+                        help="TrueType/OpenType font file (default: a system bold sans)")
+    parser.add_argument("--color", default="auto",
+                        help="Headline color as hex (e.g. '#FFFFFF') or 'auto' (default: auto)")
+    parser.add_argument("--max-lines", type=int, default=2,
+                        help="Maximum lines per headline (default: 2)")
+    parser.add_argument("--output-dir", default="screenshots",
+                        help="Output directory; one subfolder per locale (default: screenshots)")
+
+    args = parser.parse_args()
+
+    with open(args.prompts) as f:
+        records = sorted(json.load(f), key=lambda r: r["index"])
+    records = [r.get("marketing", r) for r in records]
+    if len(records) != len(args.images):
+        sys.exit(f"{len(args.images)} images provided for {len(records)} prompts")
+
+    if args.locales:
+        with open(args.locales) as f:
+            locales = json.load(f)
+    else:
+        locales = {"": [r["headline"] for r in records]}
+
+    images = [Image.open(p) for p in args.images]
+    for im in images:
+        im.load()
+    font_factory = load_font_factory(args.font)
+    color = _parse_color(args.color)
+    if color is None:
+        color = auto_text_color(images, records)
+
+    print()
+    for locale, headlines in locales.items():
+        if len(headlines) != len(records):
+            sys.exit(f"Locale '{locale}': {len(headlines)} headlines for {len(records)} screens")
+        composited, size = composite_headlines(images, records, headlines, font_factory, color, args.max_lines)
+        out_dir = os.path.join(args.output_dir, locale) if locale else args.output_dir
+        os.makedirs(out_dir, exist_ok=True)
+        for path, image in zip(args.images, composited):
+            name = os.path.splitext(os.path.basename(path))[0] + ".png"
+            image.save(os.path.join(out_dir, name))
+        print(f"{locale or 'default':<10} font size {size}px → {out_dir}")
+    print()
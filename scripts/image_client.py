@@ -0,0 +1,168 @@
+import base64
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+# --- IMAGE BACKEND CLIENT ---
+# Minimal stdlib client for an image-generation endpoint that accepts
+#   POST /v1/images/generate  {"prompt", "resolution", "reference_image"?}
+# and answers with the raw image bytes. Used by the load-test harness against
+# backend_simulator.py, and by anything else that replays prompts.json records.
+
+GENERATE_PATH = "/v1/images/generate"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BackendError(Exception):
+    """Non-2xx response from an image backend."""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status in RETRYABLE_STATUSES
+
+
+def load_records(prompts_path):
+    """Load request records from prompts.json, mockup_prompts.json or pipeline_prompts.json.
+
+    Pipeline stages are flattened into their mockup and marketing records,
+    in stage order, since both stages are separate image calls.
+    """
+    with open(prompts_path) as f:
+        data = json.load(f)
+    records = []
+    for r in data:
+        if "marketing" in r:
+            records.extend([r["mockup"], r["marketing"]])
+        else:
+            records.append(r)
+    return records
+
+
+def build_request_body(record):
+    """Build the JSON request body for a prompt record.
+
+    The reference image (input_file) is only attached when it exists on disk;
+    mockup records and not-yet-generated pipeline inputs are sent prompt-only.
+    Keyed-screen records are also sent prompt-only: their input_file is
+    composited locally by screen_compositor.py, not shown to the model.
+    """
+    body = {
+        "prompt": record["prompt"],
+        "resolution": record.get("resolution", "1080x1920"),
+    }
+    input_file = record.get("input_file")
+    if input_file and not record.get("screen_key") and os.path.isfile(input_file):
+        with open(input_file, "rb") as f:
+            body["reference_image"] = base64.b64encode(f.read()).decode("ascii")
+    return body
+
+
+def request_image(base_url, body, timeout=120.0):
+    """POST one generation request and return the image bytes.
+
+    Raises:
+        BackendError: On any non-2xx response.
+        OSError: On connection failures and timeouts.
+    """
+    return CancellableRequest(base_url, body, timeout).run()
+
+
+class CancellableRequest:
+    """A single generation request that another thread can abort.
+
+    run() blocks like request_image(); cancel() shuts the socket down so a
+    blocked run() fails fast with OSError. Used for hedged requests, where the
+    slower duplicate is cancelled once the first response arrives.
+    """
+
+    def __init__(self, base_url, body, timeout=120.0):
+        self.base_url = base_url
+        self.body = body
+        self.timeout = timeout
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        url = urlsplit(self.base_url)
+        conn_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            if self.cancelled:
+                raise OSError("request cancelled")
+            self._conn = conn_cls(url.hostname, url.port, timeout=self.timeout)
+        try:
+            self._conn.request("POST", url.path.rstrip("/") + GENERATE_PATH,
+                               body=json.dumps(self.body).encode("utf-8"),
+                               headers={"Content-Type": "application/json"})
+            resp = self._conn.getresponse()
+            data = resp.read()
+            if resp.status >= 300:
+                retry_after = resp.getheader("Retry-After")
+                raise BackendError(resp.status, data[:200].decode("utf-8", "replace"),
+                                   float(retry_after) if retry_after else None)
+            return data
+        except http.client.HTTPException as e:
+            # A cancelled connection can surface as a protocol error or a
+            # torn-down socket rather than a clean OSError.
+            raise OSError(f"request aborted: {e}") from e
+        finally:
+            self._conn.close()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def request_with_retries(base_url, body, max_retries=5, backoff=1.0, timeout=120.0):
+    """Request an image, retrying 429s and 5xx with exponential backoff.
+
+    Honors the server's Retry-After header when present; otherwise waits
+    backoff * 2**attempt with full jitter.
+
+    Returns:
+        (image_bytes, retries, throttled) — retries is the number of extra
+        attempts made, throttled how many of them were caused by a 429.
+    """
+    retries = 0
+    throttled = 0
+    while True:
+        try:
+            return request_image(base_url, body, timeout), retries, throttled
+        except BackendError as e:
+            if not e.retryable or retries >= max_retries:
+                raise
+            if e.status == 429:
+                throttled += 1
+            delay = e.retry_after if e.retry_after is not None else random.uniform(0, backoff * 2 ** retries)
+        except OSError:
+            if retries >= max_retries:
+                raise
+            delay = random.uniform(0, backoff * 2 ** retries)
+        retries += 1
+        time.sleep(delay)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
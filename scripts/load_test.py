@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from image_client import BackendError, build_request_body, load_records, percentile, request_with_retries
+
+# --- END-TO-END LOAD TEST ---
+# Replays one or more prompts.json files against an image backend (normally
+# backend_simulator.py) and reports what a real generation run would see:
+# throughput, end-to-end latency percentiles (including retry waits), retry
+# and 429 counts, and hard failures.
+
+
+def run_load_test(base_url, records, concurrency=1, max_retries=5, backoff=1.0, timeout=120.0):
+    """Replay prompt records against base_url and collect per-request results.
+
+    Returns:
+        (results, wall_seconds) where results is a list of dicts with keys:
+        index, ok, latency, retries, throttled, bytes, error.
+    """
+    bodies = [build_request_body(r) for r in records]
+    results = []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        result = {"index": records[i].get("index"), "ok": False, "retries": 0,
+                  "throttled": 0, "bytes": 0, "error": None}
+        try:
+            data, result["retries"], result["throttled"] = request_with_retries(
+                base_url, bodies[i], max_retries, backoff, timeout)
+            result["ok"] = True
+            result["bytes"] = len(data)
+        except (BackendError, OSError) as e:
+            result["error"] = str(e)
+        result["latency"] = time.perf_counter() - start
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(len(bodies))))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, wall_seconds):
+    """Aggregate load-test results into a report dict."""
+    latencies = [r["latency"] for r in results if r["ok"]]
+    succeeded = len(latencies)
+    return {
+        "requests": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_min": round(succeeded / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "latency_p99": round(percentile(latencies, 99), 3),
+        "retries": sum(r["retries"] for r in results),
+        "throttled": sum(r["throttled"] for r in results),
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test an image backend by replaying prompts.json files")
+    parser.add_argument("--url", default="http://127.0.0.1:8765",
+                        help="Backend base URL (default: http://127.0.0.1:8765, the simulator)")
+    parser.add_argument("--prompts", nargs="+", required=True,
+                        help="prompts.json / mockup_prompts.json / pipeline_prompts.json files to replay")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Replay the combined records this many times (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Concurrent in-flight requests (default: 1, the sequential workflow)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Retries per request on 429/5xx/connection errors (default: 5)")
+    parser.add_argument("--backoff", type=float, default=1.0,
+                        help="Base backoff in seconds when no Retry-After is sent (default: 1.0)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Per-attempt timeout in seconds (default: 120)")
+    parser.add_argument("--output", default=None,
+                        help="Optional path to write the JSON report to")
+
+    args = parser.parse_args()
+
+    records = []
+    for path in args.prompts:
+        records.extend(load_records(path))
+    records = records * args.repeat
+
+    print(f"\nReplaying {len(records)} requests against {args.url} (concurrency={args.concurrency})...")
+    results, wall = run_load_test(args.url, records, args.concurrency, args.max_retries,
+                                  args.backoff, args.timeout)
+    report = summarize(results, wall)
+
+    print()
+    sep = "-" * 40
+    print(sep)
+    for key in ("requests", "succeeded", "failed", "wall_seconds", "throughput_per_min",
+                "latency_p50", "latency_p95", "latency_p99", "retries", "throttled"):
+        print(f"{key:<22} {report[key]}")
+    print(sep)
+    for err in report["errors"]:
+        print(f"error: {err}")
+    print()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report → {args.output}\n")
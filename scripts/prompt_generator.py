@@ -1,6 +1,7 @@
 import argparse
 import json
 import os
+import re
 
 # --- DEVICE PRESETS ---
 # Maps device keys to (display_name, default_resolution_portrait, default_resolution_landscape).
@@ -144,10 +145,11 @@ def _get_ar_frame(platform, orientation):
 
 # --- COMPOSITION GUARDRAILS (injected into EVERY prompt) ---
 # NOTE: Rule 5 (aspect ratio reminder) is injected dynamically per-platform.
-COMPOSITION_RULES_BASE = (
-    "COMPOSITION RULES: "
+_RULE_SIZING = (
     "1) DEVICE/CONTENT SIZING (CRITICAL): The device (or floating UI plane) must fill approximately 55-60% of the total screenshot HEIGHT "
     "and approximately 90% of the total screenshot WIDTH. It is the hero subject — large and prominent. "
+)
+_RULE_TEXT_BAKED = (
     "Leave a 20-25% text zone at the top or bottom for the headline. "
     "The remaining space is clean breathing room around the subject. "
     "2) TEXT PLACEMENT & TYPOGRAPHY: The headline text MUST be placed ABOVE the subject (in the top 20-25% of the image) "
@@ -155,15 +157,109 @@ COMPOSITION_RULES_BASE = (
     "The text must NEVER overlap, cover, or obstruct ANY part of the UI screen. "
     "The headline should be on the background area only. "
     "TYPOGRAPHY CONSISTENCY (CRITICAL): The headline text MUST use exactly the same font family, font size, and font color across all images in the sequence to ensure a uniform design. "
+)
+_RULE_BACKGROUND = (
     "3) CLEAN BACKGROUND: The background should be clean and minimal. "
     "No random floating objects unless the style (e.g. 3d_playful, immersive_scene) explicitly calls for them. "
-    "The focus is: background + subject + headline text. "
+)
+_RULE_MATERIALITY = (
     "4) MATERIALITY (CRITICAL): Every surface must have a defined texture (glass, metal, plastic, liquid). "
     "NOTHING should look flat or unrendered. All materials must react to light. "
 )
+COMPOSITION_RULES_BASE = (
+    "COMPOSITION RULES: " + _RULE_SIZING + _RULE_TEXT_BAKED + _RULE_BACKGROUND
+    + "The focus is: background + subject + headline text. " + _RULE_MATERIALITY
+)
+
+# --- TEXT-FREE SCENES (headline_mode="composited") ---
+# The model renders the scene with an EMPTY, reserved headline zone at the top;
+# headlines are drawn afterwards by scripts/headline_compositor.py with real
+# font metrics. A headline change or a new locale is then a local text render,
+# not a regeneration, and typography is identical across the sequence.
+HEADLINE_ZONE_RATIO = 0.22
+
+_RULE_TEXT_FREE = (
+    f"Leave the TOP {int(HEADLINE_ZONE_RATIO * 100)}% of the image as an EMPTY headline zone. "
+    "The remaining space is clean breathing room around the subject. "
+    f"2) EMPTY HEADLINE ZONE (CRITICAL): The top {int(HEADLINE_ZONE_RATIO * 100)}% of the image contains ONLY the continuous background — "
+    "NO text, letters, numbers, words, logos, watermarks, or objects of any kind. "
+    "The subject sits entirely BELOW this zone and never enters it. "
+    "Headlines are added later in post-production; do NOT render any text anywhere in the image. "
+)
+COMPOSITION_RULES_TEXT_FREE = (
+    "COMPOSITION RULES: " + _RULE_SIZING + _RULE_TEXT_FREE + _RULE_BACKGROUND
+    + "The focus is: background + subject. " + _RULE_MATERIALITY
+)
+
+# --- KEYED SCREENS (screen_mode="keyed") ---
+# Models still alter the UI even when told to match the reference exactly.
+# In keyed mode the model renders the device/scene with a flat chroma-key
+# screen instead, and scripts/screen_compositor.py warps the original
+# input_file pixels into that quad locally — the UI is pixel-exact by
+# construction. Use magenta when the brand or style is green-heavy.
+DEFAULT_SCREEN_KEY = "#00FF00"
+
+
+def _keyed_screen_directive(surface, screen_key):
+    """Prompt fragment asking for a flat, keyable placeholder screen."""
+    return (
+        f"The {surface} shows NO app content: it is filled edge to edge with a perfectly flat, uniform, "
+        f"solid chroma-key color {screen_key}. No UI, text, icons, gradients, shading, reflections, glare, "
+        f"or noise on the {surface} — one exact color, like a chroma-key screen. The {surface} edges are crisp. "
+        f"The key color must NOT glow, spill, or reflect onto the frame, the background, or any other surface. "
+    )
 
 # --- STYLE PROMPTS (detailed, opinionated, bulletproof) ---
 # Each style avoids hardcoded colors — uses relative color descriptions so --app-colors override works cleanly.
+# Style-level typography directives live in STYLE_TYPOGRAPHY so text-free
+# (composited) prompts can drop them instead of contradicting "NO TEXT".
+_TYPOGRAPHY_MINIMALIST = (
+    "TYPOGRAPHY ZONE: The headline text area uses a bold, Swiss-style grotesque typeface (Helvetica Neue, SF Pro, or Inter) "
+    "in a high-contrast tone against the background. Large, confident, minimal. "
+)
+STYLE_TYPOGRAPHY = {
+    "minimalist": _TYPOGRAPHY_MINIMALIST,
+}
+
+# Likewise, directives that make the screen a light source live in
+# STYLE_SCREEN_GLOW as (fragment, keyed replacement) pairs. In keyed mode the
+# screen is a flat chroma-key color, and any glow or color cast from it is key
+# spill far wider than screen_compositor.py can despill.
+_GLOW_MINIMALIST = "The device screen is the only source of color in the scene. "
+_GLOW_DARK_FUTURISTIC = (
+    "The screen emits 'screen space global illumination' — the UI colors bleed onto the surrounding frame as a colored glow halo. "
+)
+_GLOW_ETHEREAL_BOKEH = "The device screen is the brightest element in the scene. "
+_GLOW_CLAY_3D = (
+    "The screen content remains full-color and sharp — ONLY the device body is clay. "
+    "This contrast between the colorful screen and the matte clay body is the key visual tension. "
+)
+_GLOW_IMMERSIVE_PANE = (
+    "FRAMELESS UI: NO PHONE FRAME. The app screenshot appears as a high-quality, glowing physical pane of glass or "
+    "hologram floating in the environment. The pane has: (1) Thickness — visible edge depth of 4-6px. "
+    "(2) Glass refraction — the edges of the pane slightly distort what's behind them. "
+    "(3) A subtle glow — the screen content emits light that illuminates nearby surfaces. (4) NO BEZEL — the UI goes edge-to-edge. "
+)
+_GLOW_IMMERSIVE_LIGHTING = (
+    "LIGHTING: Dynamic, cinematic lighting. The glowing UI pane is a light source — it casts the UI's colors onto nearby "
+    "props and the environment floor. "
+)
+_GLOW_IMMERSIVE_SHADOW = "The UI pane casts a colored shadow (matching the dominant UI color) onto the floor beneath it. "
+STYLE_SCREEN_GLOW = {
+    "minimalist": [(_GLOW_MINIMALIST, "")],
+    "dark_futuristic": [(_GLOW_DARK_FUTURISTIC, "")],
+    "ethereal_bokeh": [(_GLOW_ETHEREAL_BOKEH, "")],
+    "clay_3d": [(_GLOW_CLAY_3D, "ONLY the device body is clay. ")],
+    "immersive_scene": [
+        (_GLOW_IMMERSIVE_PANE,
+         "FRAMELESS UI: NO PHONE FRAME. The screen appears as a physical pane of glass floating in the environment. "
+         "The pane has: (1) Thickness — visible edge depth of 4-6px. (2) NO BEZEL — the pane face goes edge-to-edge. "
+         "The pane emits NO light. "),
+        (_GLOW_IMMERSIVE_LIGHTING, "LIGHTING: Dynamic, cinematic lighting. "),
+        (_GLOW_IMMERSIVE_SHADOW, "The UI pane casts a neutral shadow onto the floor beneath it. "),
+    ],
+}
+
 STYLES = {
     "glassmorphism": (
         "STYLE: Premium Prismatic Glassmorphism — a flagship product launch aesthetic. "
@@ -194,11 +290,10 @@ STYLES = {
         "edge and corner — dark, tight shadows in crevices. Frame color is either pure white or deep space grey. "
         "LIGHTING: Global Illumination (GI) soft box lighting from directly overhead — even, diffused, no harsh shadows. "
         "A subtle gradient of light falls off toward the bottom of the image (top is slightly brighter). "
-        "The device screen is the only source of color in the scene. "
+        + _GLOW_MINIMALIST +
         "SHADOWS: A single, precise, soft contact shadow directly beneath the device — 20px blur, 40% opacity. "
         "No other shadows exist in the scene. The shadow is perfectly centered. "
-        "TYPOGRAPHY ZONE: The headline text area uses a bold, Swiss-style grotesque typeface (Helvetica Neue, SF Pro, or Inter) "
-        "in a high-contrast tone against the background. Large, confident, minimal. "
+        + _TYPOGRAPHY_MINIMALIST +
         "CAMERA: 50mm prime lens at f/4, perfectly centered composition. Mathematical precision. No lens distortion. "
         "VIBE: Apple Store display table. Museum exhibition. Unboxing experience. Restrained confidence."
     ),
@@ -211,7 +306,7 @@ STYLES = {
         "in a color complementing the app's palette (e.g., electric cyan, hot magenta, or acid green). "
         "These strips reflect on the wet floor surface as elongated colored smears. "
         "DEVICE FRAME: Glossy black titanium with 'carbon fiber weave' texture visible on the back edges. "
-        "The screen emits 'screen space global illumination' — the UI colors bleed onto the surrounding frame as a colored glow halo. "
+        + _GLOW_DARK_FUTURISTIC +
         "LIGHTING: (1) Single hard rim light from directly behind the device — creates a bright white outline on both device edges. "
         "(2) Two colored point lights (matching neon accent colors) positioned left and right, casting colored shadows. "
         "(3) Volumetric fog haze at 10% opacity in the lower third. 'Ray-traced reflections' on the wet floor. "
@@ -272,7 +367,7 @@ STYLES = {
         "LIGHTING: Extremely soft focus with heavy 'bloom' effect on all highlights. Overexposed light sources create "
         "'halation' — a soft glow that bleeds into surrounding areas. Backlit particles glow with rim light. "
         "The entire scene feels like it's shot through gauze or a Tiffen Pro-Mist filter. "
-        "The device screen is the brightest element in the scene. "
+        + _GLOW_ETHEREAL_BOKEH +
         "DEVICE FRAME: Clean, semi-transparent frame edges that catch and refract the particle light. "
         "The frame appears to glow slightly, as if particles are attracted to it. Frame color is neutral (white or very light grey). "
         "SHADOWS: Very soft, almost imperceptible. A barely-visible soft shadow (5% opacity, 60px blur) suggests grounding. "
@@ -328,8 +423,8 @@ STYLES = {
         "DEVICE FRAME: The device body is rendered in a 'matte clay' finish — smooth, rounded edges, zero metallic sheen. "
         "The clay material is the same color as the background (or a slightly darker/lighter variant), making the device "
         "feel sculpted from the environment. The clay has visible 'ambient occlusion' in every crevice — dark, tight shadows "
-        "where surfaces meet. The screen content remains full-color and sharp — ONLY the device body is clay. "
-        "This contrast between the colorful screen and the matte clay body is the key visual tension. "
+        "where surfaces meet. "
+        + _GLOW_CLAY_3D +
         "CLAY MATERIAL DETAIL: The clay surface shows subtle light-to-shadow gradations across curved surfaces — "
         "the top face of the device is lighter, the sides are mid-tone, the bottom is darkest. No specular highlights — 100% matte. "
         "LIGHTING: Soft, diffused dome light from above. Even illumination with gentle shadows. "
@@ -372,18 +467,15 @@ STYLES = {
         "Atmospheric effects are present (volumetric fog, dust particles, light rays, heat shimmer). "
         "The lighting in the environment is motivated — there are visible light sources (windows, screens, lamps, neon signs) "
         "that explain where the light is coming from. "
-        "FRAMELESS UI: NO PHONE FRAME. The app screenshot appears as a high-quality, glowing physical pane of glass or "
-        "hologram floating in the environment. The pane has: (1) Thickness — visible edge depth of 4-6px. "
-        "(2) Glass refraction — the edges of the pane slightly distort what's behind them. "
-        "(3) A subtle glow — the screen content emits light that illuminates nearby surfaces. (4) NO BEZEL — the UI goes edge-to-edge. "
+        + _GLOW_IMMERSIVE_PANE +
         "3D PROPS: 3D objects relevant to the app's function float or rest near the UI pane, adding context and storytelling. "
         "These props are photorealistic and cast real shadows. They interact with the UI pane "
         "(e.g., a prop partially behind the pane, partially in front, creating depth). "
-        "LIGHTING: Dynamic, cinematic lighting. The glowing UI pane is a light source — it casts the UI's colors onto nearby "
-        "props and the environment floor. Additional motivated lighting from the environment. "
+        + _GLOW_IMMERSIVE_LIGHTING +
+        "Additional motivated lighting from the environment. "
         "Volumetric fog/rays may be present, catching the light. "
         "SHADOWS: Realistic contact shadows from props and the UI pane onto the environment. "
-        "The UI pane casts a colored shadow (matching the dominant UI color) onto the floor beneath it. "
+        + _GLOW_IMMERSIVE_SHADOW +
         "CAMERA: 35mm lens at f/2.0. The environment background is slightly out of focus (bokeh), keeping the UI pane as "
         "the sharp focal point. Shot from eye level or slightly below for a dramatic, immersive perspective. "
         "VIBE: Breaking the fourth wall. The app is not just on a phone — it's part of the world. "
@@ -591,7 +683,8 @@ def resolve_device(device_key, custom_device_name=None, platform="auto"):
 def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
                      screenshots=None, headlines=None, aspect_ratio="9:16",
                      story_arc=None, device="iphone_16_pro", custom_device_name=None,
-                     app_colors=None, platform="auto"):
+                     app_colors=None, platform="auto", headline_mode="baked",
+                     screen_mode="reference", screen_key=DEFAULT_SCREEN_KEY):
     """
     Generates a sequence of prompts for app store screenshots.
 
@@ -609,6 +702,15 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
         custom_device_name: Custom device name when device="custom".
         app_colors: App's brand color palette (e.g., "Navy Blue, Warm Cream, Gold").
         platform: Target platform — "play_store", "app_store", or "auto" (auto-detect from device).
+        headline_mode: "baked" (the model renders the headline) or "composited"
+            (the model leaves an empty headline zone for headline_compositor.py).
+        screen_mode: "reference" (the model reproduces input_file on the screen) or
+            "keyed" (the model renders a flat screen_key screen for screen_compositor.py).
+        screen_key: Hex chroma-key color used when screen_mode="keyed".
+
+    Raises:
+        ValueError: If screen_mode="keyed" and a screen has no screenshot — the
+            key would have nothing to be replaced with.
     """
     if screenshots is None:
         screenshots = []
@@ -626,6 +728,12 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
         # Force count to match screenshots so no image is dropped
         count = len(screenshots)
 
+    # --- KEYED SCREENS NEED THE REAL UI ---
+    if screen_mode == "keyed" and len(screenshots) < count:
+        raise ValueError("--screen-mode keyed needs a screenshot for every screen (screen_compositor.py "
+                         "fills the key with it); pass --screenshots, or use --mode pipeline to "
+                         "generate mockups first")
+
     # --- DEVICE RESOLUTION ---
     device_name, res_portrait, res_landscape = resolve_device(device, custom_device_name, platform)
 
@@ -638,6 +746,11 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
 
     # --- STYLE ---
     selected_style = STYLES.get(style_mode, STYLES["glassmorphism"])
+    if headline_mode == "composited" and style_mode in STYLE_TYPOGRAPHY:
+        selected_style = selected_style.replace(STYLE_TYPOGRAPHY[style_mode], "")
+    if screen_mode == "keyed":
+        for fragment, replacement in STYLE_SCREEN_GLOW.get(style_mode, []):
+            selected_style = selected_style.replace(fragment, replacement)
 
     # --- COLOR OVERRIDE ---
     color_override = ""
@@ -679,9 +792,43 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
         if screenshots and (i - 1) < len(screenshots):
             ss_file = screenshots[i - 1]
 
+        # HEADLINE DIRECTIVE: baked into the image, or an empty zone for compositing
+        subject = "UI plane" if device == "no_device" else "device"
+        if headline_mode == "composited":
+            headline_directive = (
+                f"The top {int(HEADLINE_ZONE_RATIO * 100)}% of the image is an EMPTY headline zone "
+                f"(background only, NO text) — the {subject} sits entirely below it."
+            )
+        elif device == "no_device":
+            headline_directive = (
+                f"The headline text '{headline}' is placed ABOVE or BELOW the UI plane, "
+                f"integrated into the scene composition — NOT overlapping the UI content."
+            )
+        else:
+            headline_directive = (
+                f"The headline text '{headline}' is placed ABOVE or BELOW the device, "
+                f"on the background — NOT on the device screen."
+            )
+
         # BUILD VISUAL FOCUS
         # FULL PROMPT
-        if device == "no_device":
+        if screen_mode == "keyed":
+            # KEYED SCREEN: UI is composited locally from input_file afterwards
+            if device == "no_device":
+                visual_focus = (
+                    f"A frameless, floating flat pane in {orientation} orientation with rounded corners. "
+                    f"{_keyed_screen_directive('pane', screen_key)}"
+                    f"The pane is {framing.replace('device', 'pane')}. "
+                    f"{headline_directive}"
+                )
+            else:
+                visual_focus = (
+                    f"A {device_name} device in {orientation} orientation. "
+                    f"{_keyed_screen_directive('device screen', screen_key)}"
+                    f"The device is {framing}. "
+                    f"{headline_directive}"
+                )
+        elif device == "no_device":
              # NO DEVICE / FRAMELESS LOGIC
             visual_focus = (
                 f"A frameless, floating UI plane in {orientation} orientation, "
@@ -689,8 +836,7 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
                 f"The screen content must EXACTLY match the input reference image. "
                 f"Do NOT generate, hallucinate, or invent new UI elements. "
                 f"The UI plane is {framing.replace('device', 'UI plane')}. "
-                f"The headline text '{headline}' is placed ABOVE or BELOW the UI plane, "
-                f"integrated into the scene composition — NOT overlapping the UI content."
+                f"{headline_directive}"
             )
         elif ss_file:
             visual_focus = (
@@ -699,8 +845,7 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
                 f"The screen content must EXACTLY match the input reference image. "
                 f"Do NOT generate, hallucinate, or invent new UI elements. "
                 f"The device is {framing}. "
-                f"The headline text '{headline}' is placed ABOVE or BELOW the device, "
-                f"on the background — NOT on the device screen."
+                f"{headline_directive}"
             )
         else:
             visual_focus = (
@@ -708,8 +853,7 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
                 f"running the {app_name} app. "
                 f"The device is {framing}. "
                 f"The screen displays content relevant to {category}, showcasing: {usp}. "
-                f"The headline text '{headline}' is placed ABOVE or BELOW the device, "
-                f"on the background — NOT on the device screen."
+                f"{headline_directive}"
             )
 
         # --- ASPECT RATIO FRAMING (PLATFORM-AWARE) ---
@@ -718,7 +862,15 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
         ar_prefix = ar_frame["prefix"]
         ar_suffix = ar_frame["suffix"]
         ar_reminder = ar_frame["ar_reminder"]
-        composition_rules = COMPOSITION_RULES_BASE + ar_reminder
+        if headline_mode == "composited":
+            composition_rules = COMPOSITION_RULES_TEXT_FREE + ar_reminder
+            typography_directive = "NO TEXT (CRITICAL): Do not render any headline, caption, or lettering in this image. "
+        else:
+            composition_rules = COMPOSITION_RULES_BASE + ar_reminder
+            typography_directive = (
+                "TYPOGRAPHY CONSISTENCY (CRITICAL): Use exactly the same font family, font size, and font color "
+                "for the headline text as the other images in this sequence. "
+            )
 
         # FULL PROMPT — Triple reinforcement:
         #   START: ar_prefix (primary control, natural language)
@@ -734,11 +886,11 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
             f"SUBJECT: {visual_focus} "
             f"SEQUENCE: This is screenshot {i} in a {count}-image panoramic sequence. "
             f"Maintain consistent background gradient direction and color palette across all images. "
-            f"TYPOGRAPHY CONSISTENCY (CRITICAL): Use exactly the same font family, font size, and font color for the headline text as the other images in this sequence. "
+            f"{typography_directive}"
             f"{ar_suffix}"
         )
 
-        prompts.append({
+        record = {
             "index": i,
             "role": role,
             "headline": headline,
@@ -747,38 +899,326 @@ def generate_prompts(app_name, category, count, usp, style_mode="glassmorphism",
             "device": device_name,
             "aspect_ratio": aspect_ratio,
             "resolution": resolution,
-        })
+            "platform": resolved_platform,
+        }
+        if headline_mode == "composited":
+            record["headline_zone"] = {"position": "top", "height_ratio": HEADLINE_ZONE_RATIO}
+        if screen_mode == "keyed":
+            record["screen_key"] = screen_key
+        prompts.append(record)
 
     return prompts
 
 
+def _slugify(text):
+    """Lowercase, filesystem-safe version of a name (e.g. 'My App!' -> 'my_app')."""
+    slug = re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+    return slug or "app"
+
+
+# --- PIPELINED FROM-SCRATCH GENERATION ---
+# Instead of two strict phases (all mockups, then a second CLI run for all
+# marketing shots), each screen becomes a two-stage dependency:
+#   mockup i  ->  marketing i  (input_file = mockup i's output_file)
+# Both stages are built from the same inputs in a single run, so marketing i
+# can be generated as soon as mockup i exists instead of waiting for the
+# whole mockup phase to finish. The latency win comes from overlap: the agent
+# issues marketing i and mockup i+1 as parallel calls (see SKILL.md), i.e.
+# N+1 rounds of image calls instead of 2N.
+def generate_pipeline_prompts(app_name, category, count, usp, style_mode="glassmorphism",
+                              screen_descriptions=None, headlines=None, aspect_ratio="9:16",
+                              story_arc=None, device="iphone_16_pro", custom_device_name=None,
+                              app_colors=None, platform="auto", headline_mode="baked",
+                              screen_mode="reference", screen_key=DEFAULT_SCREEN_KEY,
+                              mockup_dir="mockups"):
+    """Generate paired mockup -> marketing prompts for from-scratch mode.
+
+    Args:
+        mockup_dir: Directory the generated mockups will be saved to. Each
+            mockup's output_file is used as the marketing stage's input_file.
+        All other args are forwarded to generate_screen_mockup_prompts()
+        and generate_prompts().
+
+    Returns:
+        List of stage dicts with keys: index, mockup, marketing. 'mockup'
+        is a mockup prompt dict plus output_file; 'marketing' is the
+        generate_prompts() dict for the same screen.
+    """
+    if count is None:
+        count = 5
+
+    mockups = generate_screen_mockup_prompts(
+        app_name=app_name,
+        category=category,
+        count=count,
+        usp=usp,
+        screen_descriptions=screen_descriptions,
+        app_colors=app_colors,
+        platform=platform,
+        device=device,
+    )
+
+    slug = _slugify(app_name)
+    for m in mockups:
+        m["output_file"] = os.path.join(mockup_dir, f"{slug}_mockup_{m['index']}.png")
+
+    marketing = generate_prompts(
+        app_name=app_name,
+        category=category,
+        count=count,
+        usp=usp,
+        style_mode=style_mode,
+        screenshots=[m["output_file"] for m in mockups],
+        headlines=headlines,
+        aspect_ratio=aspect_ratio,
+        story_arc=story_arc,
+        device=device,
+        custom_device_name=custom_device_name,
+        app_colors=app_colors,
+        platform=platform,
+        headline_mode=headline_mode,
+        screen_mode=screen_mode,
+        screen_key=screen_key,
+    )
+
+    return [
+        {"index": m["index"], "mockup": m, "marketing": p}
+        for m, p in zip(mockups, marketing)
+    ]
+
+
+def generate_for_mode(mode, options):
+    """Route CLI-style options to the generator for a mode.
+
+    Args:
+        mode: "mockup", "marketing", or "pipeline".
+        options: Dict keyed like the CLI arguments (name, category, usp, count,
+            style, screenshots, ...). Missing keys fall back to generator defaults.
+
+    Returns:
+        (records, output_filename)
+    """
+    opt = options.get
+    if mode == "mockup":
+        result = generate_screen_mockup_prompts(
+            app_name=opt("name"),
+            category=opt("category"),
+            count=opt("count") or 5,
+            usp=opt("usp"),
+            screen_descriptions=opt("screen_descriptions"),
+            app_colors=opt("app_colors"),
+            platform=opt("platform", "auto"),
+            device=opt("device", "iphone_16_pro"),
+        )
+        return result, "mockup_prompts.json"
+
+    shared = dict(
+        app_name=opt("name"),
+        category=opt("category"),
+        count=opt("count"),
+        usp=opt("usp"),
+        style_mode=opt("style", "glassmorphism"),
+        headlines=opt("headlines"),
+        aspect_ratio=opt("aspect_ratio", "9:16"),
+        story_arc=opt("story_arc"),
+        device=opt("device", "iphone_16_pro"),
+        custom_device_name=opt("custom_device_name"),
+        app_colors=opt("app_colors"),
+        platform=opt("platform", "auto"),
+        headline_mode=opt("headline_mode", "baked"),
+        screen_mode=opt("screen_mode", "reference"),
+        screen_key=opt("screen_key", DEFAULT_SCREEN_KEY),
+    )
+    if mode == "pipeline":
+        result = generate_pipeline_prompts(
+            screen_descriptions=opt("screen_descriptions"),
+            mockup_dir=os.path.join(opt("output_dir") or ".", "mockups"),
+            **shared,
+        )
+        return result, "pipeline_prompts.json"
+    result = generate_prompts(screenshots=opt("screenshots"), **shared)
+    return result, "prompts.json"
+
+
+# --- CAPACITY PLANNING (--plan) ---
+# Dry run: build the same records a real run would, then estimate what the run
+# will cost before any image call is made. Figures per phase (mockup /
+# marketing) and per app:
+#   calls         = records * (1 + regen_rate)        regenerations resend everything
+#   prompt tokens = prompt chars / CHARS_PER_TOKEN per call
+#   input bytes   = reference image size per call (on-disk size, or an estimate
+#                   from the resolution for images that don't exist yet)
+#   wall time     = max(calls * latency / concurrency, calls / rpm * 60)
+# i.e. whichever of the concurrency limit or the rate limit binds first.
+CHARS_PER_TOKEN = 4
+EST_PNG_BYTES_PER_PIXEL = 1.0  # typical for app UI screenshots saved as PNG
+
+
+def _estimate_input_bytes(record, fallback_resolution):
+    """Bytes uploaded as the reference image for one call of record."""
+    input_file = record.get("input_file")
+    if not input_file or record.get("screen_key"):
+        return 0, False
+    if os.path.isfile(input_file):
+        return os.path.getsize(input_file), False
+    w, h = (int(v) for v in fallback_resolution.split("x"))
+    return int(w * h * EST_PNG_BYTES_PER_PIXEL), True
+
+
+def plan_generation(mode, options, regen_rate=0.2, concurrency=1, rpm=10.0, latency=20.0):
+    """Estimate image calls, prompt tokens, upload bytes and wall time for one app.
+
+    Args:
+        mode: "mockup", "marketing", or "pipeline" (as in generate_for_mode()).
+        options: CLI-style options dict for the app.
+        regen_rate: Expected fraction of images that need one regeneration.
+        concurrency: Maximum in-flight image calls.
+        rpm: Backend rate limit in requests per minute (0 = unlimited).
+        latency: Mean seconds per image call.
+
+    Returns:
+        Plan dict with per-phase figures and app totals.
+    """
+    records, _ = generate_for_mode(mode, options)
+    if mode == "pipeline":
+        phases = {"mockup": [r["mockup"] for r in records], "marketing": [r["marketing"] for r in records]}
+    else:
+        phases = {"mockup" if mode == "mockup" else "marketing": records}
+
+    _, res_portrait, _ = resolve_device(options.get("device", "iphone_16_pro"),
+                                        options.get("custom_device_name"),
+                                        options.get("platform", "auto"))
+    plan = {"app": options.get("name"), "mode": mode, "phases": {}}
+    for phase, recs in phases.items():
+        multiplier = 1 + regen_rate
+        tokens = sum(len(r["prompt"]) for r in recs) / CHARS_PER_TOKEN
+        upload = [_estimate_input_bytes(r, res_portrait) for r in recs]
+        plan["phases"][phase] = {
+            "images": len(recs),
+            "calls": round(len(recs) * multiplier, 1),
+            "prompt_tokens": int(tokens * multiplier),
+            "input_bytes": int(sum(b for b, _ in upload) * multiplier),
+            "input_bytes_estimated": any(est for _, est in upload),
+        }
+
+    calls = sum(p["calls"] for p in plan["phases"].values())
+    plan["calls"] = round(calls, 1)
+    plan["prompt_tokens"] = sum(p["prompt_tokens"] for p in plan["phases"].values())
+    plan["input_bytes"] = sum(p["input_bytes"] for p in plan["phases"].values())
+    plan["input_bytes_estimated"] = any(p["input_bytes_estimated"] for p in plan["phases"].values())
+    plan.update(_wall_time(calls, concurrency, rpm, latency))
+    return plan
+
+
+def _wall_time(calls, concurrency, rpm, latency):
+    """Wall-time estimate for a number of calls under concurrency + rate limits."""
+    concurrency_bound = calls * latency / max(1, concurrency)
+    rate_bound = calls / rpm * 60 if rpm else 0.0
+    return {
+        "wall_seconds": round(max(concurrency_bound, rate_bound)),
+        "bottleneck": "rate_limit" if rate_bound > concurrency_bound else "concurrency",
+    }
+
+
+PLAN_MODES = ("mockup", "marketing", "pipeline")
+
+
+def validate_manifest(entries, defaults):
+    """Return a list of human-readable problems with manifest entries (empty if valid)."""
+    if not isinstance(entries, list):
+        return ["manifest must be a JSON list of per-app objects"]
+    problems = []
+    for n, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            problems.append(f"entry {n}: expected an object, got {type(entry).__name__}")
+            continue
+        options = dict(defaults, **entry)
+        label = f"entry {n}" + (f" ({options['name']})" if options.get("name") else "")
+        missing = [k for k in ("name", "category", "usp")
+                   if not isinstance(options.get(k), str) or not options[k].strip()]
+        if missing:
+            problems.append(f"{label}: missing {', '.join(missing)}")
+        if options.get("mode", "marketing") not in PLAN_MODES:
+            problems.append(f"{label}: unknown mode {options.get('mode')!r} "
+                            f"(expected one of {', '.join(PLAN_MODES)})")
+        count = options.get("count")
+        if count is not None and (isinstance(count, bool) or not isinstance(count, int) or count < 1):
+            problems.append(f"{label}: count must be a positive integer or null, got {count!r}")
+        for key in ("screenshots", "headlines", "screen_descriptions"):
+            value = options.get(key)
+            if value is not None and (not isinstance(value, list)
+                                      or not all(isinstance(v, str) for v in value)):
+                problems.append(f"{label}: {key} must be a list of strings, got {value!r}")
+    return problems
+
+
+def plan_manifest(entries, defaults, regen_rate=0.2, concurrency=1, rpm=10.0, latency=20.0):
+    """Plan every app in a manifest; apps share one backend, run back to back.
+
+    Args:
+        entries: List of per-app option dicts (CLI keys, plus optional 'mode').
+        defaults: Option dict the entries are layered over (usually the CLI args).
+
+    Raises:
+        ValueError: If an entry is invalid (see validate_manifest()).
+
+    Returns:
+        (per_app_plans, totals)
+    """
+    problems = validate_manifest(entries, defaults)
+    if problems:
+        raise ValueError("; ".join(problems))
+    plans = []
+    for entry in entries:
+        options = dict(defaults, **entry)
+        plans.append(plan_generation(options.get("mode", "marketing"), options,
+                                     regen_rate, concurrency, rpm, latency))
+    calls = sum(p["calls"] for p in plans)
+    totals = {
+        "apps": len(plans),
+        "calls": round(calls, 1),
+        "prompt_tokens": sum(p["prompt_tokens"] for p in plans),
+        "input_bytes": sum(p["input_bytes"] for p in plans),
+        "input_bytes_estimated": any(p["input_bytes_estimated"] for p in plans),
+    }
+    totals.update(_wall_time(calls, concurrency, rpm, latency))
+    return plans, totals
+
+
+def _format_duration(seconds):
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{sec:02d}s"
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate App Store Screenshot Prompts")
     parser.add_argument("--mode", default="marketing",
-                        choices=["mockup", "marketing"],
+                        choices=["mockup", "marketing", "pipeline"],
                         help="Generation mode: 'mockup' generates raw app UI screens "
-                             "(from scratch), 'marketing' generates final store screenshots "
-                             "(default: marketing).")
-    parser.add_argument("--name", required=True, help="App Name")
-    parser.add_argument("--category", required=True, help="App Category")
+                             "(from scratch), 'marketing' generates final store screenshots, "
+                             "'pipeline' pairs each mockup with its marketing prompt in one run "
+                             "(from scratch) (default: marketing).")
+    parser.add_argument("--name", help="App Name")
+    parser.add_argument("--category", help="App Category")
     parser.add_argument("--count", type=int, default=None,
                         help="Number of screenshots (default: number of --screenshots provided, or 5)")
-    parser.add_argument("--usp", required=True, help="Unique Selling Proposition")
+    parser.add_argument("--usp", help="Unique Selling Proposition")
     parser.add_argument("--style", default="glassmorphism",
                         choices=list(STYLES.keys()),
-                        help="Visual Style — only used in 'marketing' mode (default: glassmorphism)")
+                        help="Visual Style — only used in 'marketing' and 'pipeline' modes (default: glassmorphism)")
     parser.add_argument("--screenshots", nargs="+",
                         help="User's actual app screenshot file paths (marketing mode only)")
     parser.add_argument("--screen-descriptions", nargs="+",
-                        help="Screen descriptions for mockup mode (e.g., 'Home dashboard with...'). "
+                        help="Screen descriptions for mockup and pipeline modes (e.g., 'Home dashboard with...'). "
                              "If not provided, auto-generated from --category.")
     parser.add_argument("--headlines", nargs="+",
-                        help="Custom headline text per screen (marketing mode only)")
+                        help="Custom headline text per screen (marketing and pipeline modes)")
     parser.add_argument("--aspect-ratio", default="9:16", choices=["9:16", "16:9"],
                         help="Aspect ratio (default: 9:16 portrait)")
     parser.add_argument("--story-arc", default=None,
                         choices=list(STORY_ARCS.keys()),
-                        help="Story arc — marketing mode only (default: auto)")
+                        help="Story arc — marketing and pipeline modes (default: auto)")
     parser.add_argument("--device", default="iphone_16_pro",
                         choices=list(DEVICE_PRESETS.keys()) + ["custom"],
                         help="Device frame to display (default: iphone_16_pro)")
@@ -793,39 +1233,88 @@ if __name__ == "__main__":
                         help="Target platform. 'play_store' forces 9:16/1080x1920. "
                              "'app_store' forces 9:19.5/1320x2868. "
                              "'auto' detects from device (default: auto).")
+    parser.add_argument("--headline-mode", default="baked",
+                        choices=["baked", "composited"],
+                        help="'baked' renders headlines in the generated image. 'composited' leaves an "
+                             "empty headline zone for scripts/headline_compositor.py — marketing and "
+                             "pipeline modes (default: baked).")
+    parser.add_argument("--screen-mode", default="reference",
+                        choices=["reference", "keyed"],
+                        help="'reference' asks the model to reproduce the input screenshot. 'keyed' renders a "
+                             "flat chroma-key screen for scripts/screen_compositor.py to fill with the exact "
+                             "screenshot — marketing and pipeline modes (default: reference).")
+    parser.add_argument("--screen-key", default=DEFAULT_SCREEN_KEY,
+                        help="Chroma-key color for --screen-mode keyed; use '#FF00FF' for green-heavy "
+                             "brands or styles (default: #00FF00).")
+
+    parser.add_argument("--plan", action="store_true",
+                        help="Dry run: estimate image calls, prompt tokens, upload bytes and wall time "
+                             "instead of writing prompts. Writes plan.json to --output-dir.")
+    parser.add_argument("--manifest", default=None,
+                        help="With --plan: JSON list of per-app option objects (CLI keys, e.g. "
+                             "{\"name\": ..., \"mode\": \"pipeline\", \"count\": 5}) to plan a whole catalog.")
+    parser.add_argument("--regen-rate", type=float, default=0.2,
+                        help="With --plan: expected fraction of images regenerated once (default: 0.2)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="With --plan: maximum in-flight image calls (default: 1, sequential)")
+    parser.add_argument("--rpm", type=float, default=10.0,
+                        help="With --plan: backend rate limit in requests per minute, 0 = none (default: 10)")
+    parser.add_argument("--latency", type=float, default=20.0,
+                        help="With --plan: mean seconds per image call (default: 20)")
 
     args = parser.parse_args()
+    if not (args.plan and args.manifest) and not (args.name and args.category and args.usp):
+        parser.error("--name, --category and --usp are required (unless using --plan --manifest)")
+
+    # --- CAPACITY PLAN (dry run) ---
+    if args.plan:
+        if args.manifest:
+            with open(args.manifest) as f:
+                entries = json.load(f)
+        else:
+            entries = [{"mode": args.mode}]
+        defaults = dict(vars(args), mode=args.mode)
+        try:
+            plans, totals = plan_manifest(entries, defaults, args.regen_rate, args.concurrency,
+                                          args.rpm, args.latency)
+        except ValueError as e:
+            parser.error(f"invalid --manifest: {e}" if args.manifest else str(e))
+
+        output_dir = getattr(args, 'output_dir', '.')
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, "plan.json")
+        with open(output_path, "w") as f:
+            json.dump({"apps": plans, "totals": totals}, f, indent=2)
+
+        print(f"\nCapacity plan for {totals['apps']} app(s) → {output_path}")
+        print(f"regen rate {args.regen_rate:.0%} | concurrency {args.concurrency} | "
+              f"{args.rpm:g} rpm | {args.latency:g}s per image\n")
+        name_w = max(20, max(len(str(p['app'])) for p in plans) + 2)
+        header = (f"{'App':<{name_w}} {'Mode':<10} {'Mockup':>7} {'Market':>7} {'Calls':>7} "
+                  f"{'Tokens':>9} {'Upload MB':>10} {'Wall':>9}  Bottleneck")
+        sep = '-' * len(header)
+        print(sep)
+        print(header)
+        print(sep)
+        rows = plans + [dict(totals, app="TOTAL", mode="", phases={})]
+        for p in rows:
+            if p is rows[-1]:
+                print(sep)
+            mock = p['phases'].get('mockup', {}).get('calls', '')
+            mark = p['phases'].get('marketing', {}).get('calls', '')
+            est = "~" if p['input_bytes_estimated'] else ""
+            print(f"{p['app']:<{name_w}} {p['mode']:<10} {mock:>7} {mark:>7} {p['calls']:>7} "
+                  f"{p['prompt_tokens']:>9} {est + format(p['input_bytes'] / 1e6, '.1f'):>10} "
+                  f"{_format_duration(p['wall_seconds']):>9}  {p['bottleneck']}")
+        print(sep)
+        print("Calls include expected regenerations. '~' = upload size estimated from resolution.\n")
+        raise SystemExit(0)
 
     # --- ROUTE TO CORRECT GENERATOR ---
-    if args.mode == "mockup":
-        result = generate_screen_mockup_prompts(
-            app_name=args.name,
-            category=args.category,
-            count=args.count or 5,
-            usp=args.usp,
-            screen_descriptions=getattr(args, 'screen_descriptions'),
-            app_colors=getattr(args, 'app_colors'),
-            platform=args.platform,
-            device=args.device,
-        )
-        output_filename = "mockup_prompts.json"
-    else:
-        result = generate_prompts(
-            app_name=args.name,
-            category=args.category,
-            count=args.count,
-            usp=args.usp,
-            style_mode=args.style,
-            screenshots=args.screenshots,
-            headlines=args.headlines,
-            aspect_ratio=getattr(args, 'aspect_ratio'),
-            story_arc=getattr(args, 'story_arc'),
-            device=args.device,
-            custom_device_name=getattr(args, 'custom_device_name'),
-            app_colors=getattr(args, 'app_colors'),
-            platform=args.platform,
-        )
-        output_filename = "prompts.json"
+    try:
+        result, output_filename = generate_for_mode(args.mode, vars(args))
+    except ValueError as e:
+        parser.error(str(e))
 
     output_dir = getattr(args, 'output_dir', '.')
     os.makedirs(output_dir, exist_ok=True)
@@ -852,6 +1341,22 @@ if __name__ == "__main__":
             desc = p['screen_description'][:58] + '...' if len(p['screen_description']) > 60 else p['screen_description']
             print(f"{p['index']:<{idx_w}} {desc:<{desc_w}}")
         print(sep)
+    elif args.mode == "pipeline":
+        # Pipeline verification table (one row per mockup -> marketing stage)
+        idx_w = max(5, max(len(str(s['index'])) for s in result) + 2)
+        file_w = max(20, max(len(s['mockup']['output_file']) for s in result) + 2)
+        head_w = max(28, max(len(str(s['marketing']['headline'])) for s in result) + 2)
+        role_w = max(15, max(len(str(s['marketing']['role'])) for s in result) + 2)
+
+        header = f"{'Index':<{idx_w}} {'Mockup File':<{file_w}} {'Headline':<{head_w}} {'Role':<{role_w}}"
+        sep = '-' * len(header)
+        print(sep)
+        print(header)
+        print(sep)
+        for s in result:
+            print(f"{s['index']:<{idx_w}} {s['mockup']['output_file']:<{file_w}} "
+                  f"{s['marketing']['headline']:<{head_w}} {s['marketing']['role']:<{role_w}}")
+        print(sep)
     else:
         # Marketing verification table
         idx_w = max(5, max(len(str(p['index'])) for p in result) + 2)
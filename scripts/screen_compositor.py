@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    sys.exit("screen_compositor.py requires NumPy and Pillow: pip install numpy Pillow")
+
+# --- EXACT SCREEN COMPOSITING ---
+# Pairs with `prompt_generator.py --screen-mode keyed`: the model renders the
+# device/scene with a flat chroma-key screen (record["screen_key"]), and this
+# script warps the original input_file into it, so the UI is pixel-exact.
+#
+#   1. Soft key matte from color distance to the key -> anti-aliased edges.
+#   2. Connected screen regions (dual_hero renders two) on a max-pooled mask.
+#   3. Per region: fit a line to each of the 4 edges (ignoring the rounded
+#      corners), intersect them -> screen quad.
+#   4. A quad whose aspect ratio is far from the screenshot's is occluded (the
+#      dual_hero background device sits partly behind the foreground one). The
+#      side facing another screen is the clipped one: it is rebuilt from the
+#      opposite, unoccluded edge at the screenshot's aspect ratio, and the
+#      matte does the clipping. Without another screen to blame, the region is
+#      only reported.
+#   5. Homography quad -> screenshot rectangle; inverse-map + bilinear sample.
+#   6. Despill key color from the frame edge, then a subtle glare pass laid out
+#      in screen space so it follows the device's perspective.
+
+MATTE_INNER = 60.0    # color distance at or below which alpha = 1
+MATTE_OUTER = 140.0   # color distance at or above which alpha = 0
+MIN_REGION_RATIO = 0.005  # ignore key-colored specks smaller than this fraction of the image
+CORNER_TRIM = 0.15    # fraction of each edge ignored at both ends when fitting lines
+SPILL_BAND = 6        # pixels around the screen that get despilled
+OCCLUSION_RATIO = 0.75  # quad aspect / screenshot aspect outside [r, 1/r] -> occluded
+
+
+def parse_hex(color):
+    color = color.lstrip("#")
+    return np.array([int(color[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32)
+
+
+def key_matte(scene, key):
+    """Soft alpha matte (H x W, 0..1) of pixels matching the key color."""
+    dist = np.sqrt(((scene - key) ** 2).sum(axis=2))
+    return np.clip((MATTE_OUTER - dist) / (MATTE_OUTER - MATTE_INNER), 0.0, 1.0)
+
+
+def find_regions(mask):
+    """Label connected key regions on a max-pooled copy of a boolean mask.
+
+    Returns a list of boolean full-resolution masks, largest first.
+    """
+    h, w = mask.shape
+    step = max(1, max(h, w) // 512)
+    hs, ws = -(-h // step), -(-w // step)
+    padded = np.zeros((hs * step, ws * step), dtype=bool)
+    padded[:h, :w] = mask
+    small = padded.reshape(hs, step, ws, step).any(axis=(1, 3))
+
+    labels = np.zeros(small.shape, dtype=np.int32)
+    count = 0
+    for y0, x0 in zip(*np.nonzero(small)):
+        if labels[y0, x0]:
+            continue
+        count += 1
+        labels[y0, x0] = count
+        queue = deque([(y0, x0)])
+        while queue:
+            y, x = queue.popleft()
+            for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                if 0 <= ny < hs and 0 <= nx < ws and small[ny, nx] and not labels[ny, nx]:
+                    labels[ny, nx] = count
+                    queue.append((ny, nx))
+
+    full = np.repeat(np.repeat(labels, step, axis=0), step, axis=1)[:h, :w]
+    # Filter on areas first: a noisy scene can have thousands of key-colored
+    # specks, and a full-resolution mask per speck exhausts memory.
+    areas = np.bincount(full[mask], minlength=count + 1)
+    keep = [n for n in range(1, count + 1) if areas[n] >= MIN_REGION_RATIO * h * w]
+    keep.sort(key=lambda n: -areas[n])
+    return [mask & (full == n) for n in keep]
+
+
+def _boundary(region):
+    inner = region.copy()
+    inner[1:, :] &= region[:-1, :]
+    inner[:-1, :] &= region[1:, :]
+    inner[:, 1:] &= region[:, :-1]
+    inner[:, :-1] &= region[:, 1:]
+    return region & ~inner
+
+
+def _fit_line(points):
+    """Total-least-squares line through points -> (point, unit direction)."""
+    center = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - center, full_matrices=False)
+    return center, vt[0]
+
+
+def _intersect(line_a, line_b):
+    (p, d), (q, e) = line_a, line_b
+    t = np.linalg.solve(np.array([d, -e]).T, q - p)
+    return p + t[0] * d
+
+
+def find_quad(region):
+    """Estimate the screen quad (TL, TR, BR, BL) as float (x, y) corners.
+
+    Rough corners come from coordinate extremes; each edge is then refit to the
+    region's boundary pixels away from the rounded corners, and adjacent edge
+    lines are intersected for the final corners.
+    """
+    ys, xs = np.nonzero(region)
+    pts = np.stack([xs, ys], axis=1).astype(np.float64)
+    s, d = pts.sum(axis=1), pts[:, 0] - pts[:, 1]
+    rough = np.array([pts[s.argmin()], pts[d.argmax()], pts[s.argmax()], pts[d.argmin()]])
+
+    by, bx = np.nonzero(_boundary(region))
+    border = np.stack([bx, by], axis=1).astype(np.float64)
+    lines = []
+    for k in range(4):
+        a, b = rough[k], rough[(k + 1) % 4]
+        edge = b - a
+        length = np.linalg.norm(edge)
+        if length < 1:
+            return rough
+        unit = edge / length
+        rel = border - a
+        t = rel @ unit / length
+        off = np.abs(rel[:, 0] * unit[1] - rel[:, 1] * unit[0])
+        sel = border[(t > CORNER_TRIM) & (t < 1 - CORNER_TRIM) & (off < max(3.0, 0.05 * length))]
+        lines.append(_fit_line(sel) if len(sel) >= 2 else (a, unit))
+    try:
+        return np.array([_intersect(lines[k - 1], lines[k]) for k in range(4)])
+    except np.linalg.LinAlgError:
+        return rough
+
+
+def _unit(v):
+    return v / (np.linalg.norm(v) or 1.0)
+
+
+def fix_occluded_quad(quad, aspect, occluders):
+    """Rebuild a quad clipped by an occluder from its unoccluded edges.
+
+    quad is (TL, TR, BR, BL); aspect is the screenshot's width / height, and
+    occluders are (x, y) centers of the other screens in the scene.
+
+    Returns:
+        (quad, occlusion) — occlusion is None, "extended" or "uncorrected".
+    """
+    tl, tr, br, bl = quad
+    width = (np.linalg.norm(tr - tl) + np.linalg.norm(br - bl)) / 2
+    height = (np.linalg.norm(bl - tl) + np.linalg.norm(br - tr)) / 2
+    ratio = (width / height) / aspect if height else 1.0
+    if OCCLUSION_RATIO <= ratio <= 1 / OCCLUSION_RATIO:
+        return quad, None
+    if not occluders:
+        return quad, "uncorrected"
+
+    occluder = np.asarray(min(occluders, key=lambda c: np.linalg.norm(np.asarray(c) - quad.mean(axis=0))))
+
+    def near(a, b):
+        return np.linalg.norm((a + b) / 2 - occluder)
+
+    if ratio < OCCLUSION_RATIO:
+        # Too narrow: the left or right side is clipped; keep the other one
+        if near(tl, bl) < near(tr, br):
+            w = np.linalg.norm(br - tr) * aspect
+            tl, bl = tr + _unit(tl - tr) * w, br + _unit(bl - br) * w
+        else:
+            w = np.linalg.norm(bl - tl) * aspect
+            tr, br = tl + _unit(tr - tl) * w, bl + _unit(br - bl) * w
+    else:
+        # Too short: the top or bottom side is clipped
+        if near(tl, tr) < near(bl, br):
+            h = np.linalg.norm(br - bl) / aspect
+            tl, tr = bl + _unit(tl - bl) * h, br + _unit(tr - br) * h
+        else:
+            h = np.linalg.norm(tr - tl) / aspect
+            bl, br = tl + _unit(bl - tl) * h, tr + _unit(br - tr) * h
+    return np.array([tl, tr, br, bl]), "extended"
+
+
+def homography(src, dst):
+    """3x3 homography H with H @ [src, 1] ~ [dst, 1] for 4 point pairs."""
+    rows, rhs = [], []
+    for (x, y), (u, v) in zip(src, dst):
+        rows.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        rows.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+        rhs.extend([u, v])
+    h = np.linalg.solve(np.array(rows, dtype=np.float64), np.array(rhs, dtype=np.float64))
+    return np.append(h, 1.0).reshape(3, 3)
+
+
+def bilinear_sample(image, u, v):
+    """Sample image (H x W x 3) at float coords, clamping to the edges."""
+    h, w = image.shape[:2]
+    u = np.clip(u, 0, w - 1)
+    v = np.clip(v, 0, h - 1)
+    x0, y0 = np.floor(u).astype(np.int64), np.floor(v).astype(np.int64)
+    x1, y1 = np.minimum(x0 + 1, w - 1), np.minimum(y0 + 1, h - 1)
+    fx, fy = (u - x0)[:, None], (v - y0)[:, None]
+    top = image[y0, x0] * (1 - fx) + image[y0, x1] * fx
+    bottom = image[y1, x0] * (1 - fx) + image[y1, x1] * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def despill(scene, key, band):
+    """Remove key-color chroma from pixels in band (boolean mask), in place."""
+    chroma = key - key.mean()
+    chroma /= np.linalg.norm(chroma) or 1.0
+    px = scene[band]
+    spill = np.clip((px - px.mean(axis=1, keepdims=True)) @ chroma, 0, None)
+    scene[band] = np.clip(px - spill[:, None] * chroma, 0, 255)
+
+
+def _dilate(mask, radius):
+    out = mask.copy()
+    for _ in range(radius):
+        grown = out.copy()
+        grown[1:, :] |= out[:-1, :]
+        grown[:-1, :] |= out[1:, :]
+        grown[:, 1:] |= out[:, :-1]
+        grown[:, :-1] |= out[:, 1:]
+        out = grown
+    return out
+
+
+def composite_screen(scene_img, screenshot_img, screen_key, glare=0.06):
+    """Warp screenshot_img into every keyed screen region of scene_img.
+
+    Returns:
+        (composited PIL RGB image, list of {"quad": [[x, y], ...], "occlusion"}
+        per screen — occlusion as returned by fix_occluded_quad)
+    """
+    scene = np.asarray(scene_img.convert("RGB"), dtype=np.float32).copy()
+    shot = np.asarray(screenshot_img.convert("RGB"), dtype=np.float32)
+    key = parse_hex(screen_key)
+    sh, sw = shot.shape[:2]
+
+    alpha = key_matte(scene, key)
+    regions = find_regions(alpha > 0.5)
+    centers = [np.argwhere(r).mean(axis=0)[::-1] for r in regions]
+    screens = []
+    for i, region in enumerate(regions):
+        quad, occlusion = fix_occluded_quad(find_quad(region), sw / sh, centers[:i] + centers[i + 1:])
+        screens.append({"quad": quad.round(1).tolist(), "occlusion": occlusion})
+        # Inverse map: scene pixel -> screenshot pixel
+        H = homography(quad, [(0, 0), (sw, 0), (sw, sh), (0, sh)])
+        area = _dilate(region, 2) & (alpha > 0)
+        ys, xs = np.nonzero(area)
+        p = H @ np.stack([xs + 0.5, ys + 0.5, np.ones(len(xs))])
+        u, v = p[0] / p[2] - 0.5, p[1] / p[2] - 0.5
+        warped = bilinear_sample(shot, u, v)
+
+        if glare > 0:
+            # Soft diagonal highlight in screen space (follows the perspective)
+            diag = (u / sw + v / sh) / 2
+            g = glare * np.clip(1 - np.abs(diag - 0.3) / 0.2, 0, 1)[:, None] * 255
+            warped = 255 - (255 - warped) * (255 - g) / 255
+
+        a = alpha[ys, xs][:, None]
+        scene[ys, xs] = scene[ys, xs] * (1 - a) + warped * a
+
+        band = _dilate(region, SPILL_BAND) & ~(alpha >= 1)
+        despill(scene, key, band)
+
+    return Image.fromarray(scene.round().astype(np.uint8)), screens
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warp exact screenshots into keyed device screens")
+    parser.add_argument("--prompts", required=True,
+                        help="prompts.json generated with --screen-mode keyed")
+    parser.add_argument("--images", nargs="+", required=True,
+                        help="Generated keyed-screen images, in prompts.json index order")
+    parser.add_argument("--glare", type=float, default=0.06,
+                        help="Strength of the screen glare pass, 0 to disable (default: 0.06)")
+    parser.add_argument("--output-dir", default="screenshots",
+                        help="Output directory (default: screenshots)")
+
+    args = parser.parse_args()
+
+    with open(args.prompts) as f:
+        records = sorted(json.load(f), key=lambda r: r["index"])
+    records = [r.get("marketing", r) for r in records]
+    if len(records) != len(args.images):
+        sys.exit(f"{len(args.images)} images provided for {len(records)} prompts")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    print()
+    for record, path in zip(records, args.images):
+        if not record.get("screen_key") or not record.get("input_file"):
+            print(f"{record['index']:<4} skipped (no screen_key/input_file — not a keyed prompt)")
+            continue
+        with Image.open(path) as scene, Image.open(record["input_file"]) as shot:
+            out, screens = composite_screen(scene, shot, record["screen_key"], args.glare)
+        out_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + ".png")
+        out.save(out_path)
+        status = f"{len(screens)} screen(s)" if screens else "WARNING: no keyed screen found"
+        extended = sum(s["occlusion"] == "extended" for s in screens)
+        uncorrected = sum(s["occlusion"] == "uncorrected" for s in screens)
+        if extended:
+            status += f", {extended} partly hidden (quad extended behind the occluder)"
+        if uncorrected:
+            status += f", WARNING: {uncorrected} partly hidden screen(s) not corrected — check the output"
+        print(f"{record['index']:<4} {status} → {out_path}")
+    print()
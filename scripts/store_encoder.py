@@ -0,0 +1,243 @@
+import argparse
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    sys.exit("store_encoder.py requires Pillow: pip install Pillow")
+
+from prompt_generator import detect_platform
+
+# --- STORE-COMPLIANT FINAL ENCODING ---
+# Generators return whatever they like (often multi-MB PNGs, sometimes with an
+# alpha channel). This stage re-encodes screenshots/ for upload:
+#   1. Flatten alpha onto a matte — neither store accepts transparency.
+#   2. Keep a lossless, optimized PNG if it already fits the byte target.
+#   3. Otherwise binary-search JPEG quality (4:4:4 chroma, so UI text stays
+#      crisp) for the HIGHEST quality under the target; fall back to 4:2:0
+#      at the quality floor before giving up.
+# Files are encoded in parallel, one process per core; a file that fails
+# (unreadable, or a Pillow encoder error) is reported without stopping the rest.
+#
+# Platform per file: --platform, else the record's "platform" in prompts.json,
+# else detect_platform(--device).
+
+# App Store Connect only accepts exact pixel sizes per display class (portrait
+# shown; the landscape swap is accepted too). Covers _APP_STORE_RES and every
+# Apple DEVICE_PRESETS resolution in prompt_generator.py.
+APP_STORE_SIZES = {
+    '6.9" iPhone': [(1320, 2868), (1290, 2796), (1260, 2736)],
+    '6.5" iPhone': [(1284, 2778), (1242, 2688)],
+    '6.3" iPhone': [(1206, 2622), (1179, 2556)],
+    '6.1" iPhone': [(1170, 2532), (1125, 2436), (1080, 2340)],
+    '5.5" iPhone': [(1242, 2208)],
+    '4.7" iPhone': [(750, 1334)],
+    '13" iPad': [(2064, 2752), (2048, 2732)],
+    '11" iPad': [(1488, 2266), (1668, 2420), (1668, 2388), (1640, 2360)],
+}
+
+STORE_RULES = {
+    # Play Console: JPEG or 24-bit PNG (no alpha), max 8 MB, sides 320-3840 px,
+    # long side at most 2x the short side.
+    "play_store": {"alpha": False, "max_bytes": 8 * 1024 * 1024,
+                   "min_side": 320, "max_side": 3840, "max_ratio": 2.0, "sizes": None},
+    # App Store Connect: JPEG or PNG, RGB, no transparency, one of the exact
+    # APP_STORE_SIZES. No per-file limit is published; the Play limit is reused
+    # as a conservative ceiling.
+    "app_store": {"alpha": False, "max_bytes": 8 * 1024 * 1024,
+                  "min_side": None, "max_side": None, "max_ratio": None, "sizes": APP_STORE_SIZES},
+}
+DEFAULT_TARGET_BYTES = 2 * 1024 * 1024
+MIN_QUALITY = 70
+MAX_QUALITY = 95
+
+
+def check_dimensions(size, rules):
+    """Return a list of human-readable dimension violations for a store."""
+    short, long_ = sorted(size)
+    problems = []
+    if rules["min_side"] and short < rules["min_side"]:
+        problems.append(f"shortest side {short}px < {rules['min_side']}px")
+    if rules["max_side"] and long_ > rules["max_side"]:
+        problems.append(f"longest side {long_}px > {rules['max_side']}px")
+    if rules["max_ratio"] and long_ / short > rules["max_ratio"]:
+        problems.append(f"aspect ratio {long_ / short:.2f} > {rules['max_ratio']}")
+    if rules["sizes"]:
+        accepted = [(cls, w, h) for cls, sizes in rules["sizes"].items() for w, h in sizes]
+        if not any((short, long_) == (w, h) for _, w, h in accepted):
+            cls, w, h = min(accepted, key=lambda a: abs(a[1] - short) + abs(a[2] - long_))
+            problems.append(f"{size[0]}x{size[1]} is not an accepted App Store size "
+                            f"(nearest: {cls} {w}x{h})")
+    return problems
+
+
+def flatten(image, matte):
+    """Drop transparency by compositing onto a solid matte color."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, matte)
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, fmt, **params):
+    buf = io.BytesIO()
+    try:
+        image.save(buf, fmt, **params)
+    except OSError:
+        if not params.get("optimize"):
+            raise
+        # Pillow sizes the optimized-JPEG buffer from the pixel count, which
+        # high-entropy 4:4:4 output can outgrow ("Suspension not allowed
+        # here"). The unoptimized encoder streams, so retry without it.
+        buf = io.BytesIO()
+        image.save(buf, fmt, **dict(params, optimize=False))
+    return buf.getvalue()
+
+
+def encode_for_store(image, target_bytes):
+    """Encode an RGB image under target_bytes with minimal quality loss.
+
+    Returns:
+        (data, extension, description) — data is None if nothing fits.
+    """
+    png = _encode(image, "PNG", optimize=True)
+    if len(png) <= target_bytes:
+        return png, ".png", "png lossless"
+
+    best = None
+    lo, hi = MIN_QUALITY, MAX_QUALITY
+    while lo <= hi:
+        quality = (lo + hi) // 2
+        data = _encode(image, "JPEG", quality=quality, subsampling=0, optimize=True)
+        if len(data) <= target_bytes:
+            best = (data, quality)
+            lo = quality + 1
+        else:
+            hi = quality - 1
+    if best:
+        return best[0], ".jpg", f"jpeg q{best[1]} 4:4:4"
+
+    data = _encode(image, "JPEG", quality=MIN_QUALITY, subsampling=2, optimize=True)
+    if len(data) <= target_bytes:
+        return data, ".jpg", f"jpeg q{MIN_QUALITY} 4:2:0"
+    return None, None, f"cannot fit {target_bytes} bytes"
+
+
+def process_file(path, platform, target_bytes, matte, output_dir):
+    """Encode one screenshot for its store. Runs in a worker process.
+
+    Errors are recorded in the result (output_file None) rather than raised,
+    so one bad file doesn't abort the batch.
+    """
+    rules = STORE_RULES[platform]
+    target = min(target_bytes, rules["max_bytes"])
+    result = {"file": path, "platform": platform, "in_bytes": None, "out_bytes": None,
+              "encoding": None, "output_file": None, "problems": []}
+    try:
+        result["in_bytes"] = os.path.getsize(path)
+        with Image.open(path) as im:
+            image = flatten(im, matte)
+        result["problems"] = check_dimensions(image.size, rules)
+        data, ext, result["encoding"] = encode_for_store(image, target)
+        if data:
+            out = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ext)
+            with open(out, "wb") as f:
+                f.write(data)
+            result["out_bytes"] = len(data)
+            result["output_file"] = out
+    except OSError as e:
+        result["encoding"] = f"error: {e}"
+    return result
+
+
+def _natural_key(path):
+    """Sort key that orders 'shot_2' before 'shot_10'."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", path)]
+
+
+def _platforms_from_prompts(prompts_path, images):
+    """Map image path -> platform using prompts.json records in index order."""
+    with open(prompts_path) as f:
+        records = sorted(json.load(f), key=lambda r: r["index"])
+    records = [r.get("marketing", r) for r in records]
+    if len(records) != len(images):
+        raise ValueError(f"{len(images)} images provided for {len(records)} prompts")
+    return {img: r.get("platform") for img, r in zip(images, records)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encode final screenshots to store rules and a byte target")
+    parser.add_argument("--images", nargs="+", default=None,
+                        help="Screenshots to encode (default: every image in --input-dir, in natural "
+                             "order so _2 comes before _10)")
+    parser.add_argument("--input-dir", default="screenshots",
+                        help="Directory of final screenshots (default: screenshots)")
+    parser.add_argument("--output-dir", default="screenshots/upload",
+                        help="Where encoded files go (default: screenshots/upload)")
+    parser.add_argument("--platform", default="auto", choices=["auto", "play_store", "app_store"],
+                        help="Target store; 'auto' uses --prompts records, then --device (default: auto)")
+    parser.add_argument("--prompts", default=None,
+                        help="prompts.json the images came from (images in index order) to read each platform")
+    parser.add_argument("--device", default="iphone_16_pro",
+                        help="Device key for platform detection when nothing else decides (default: iphone_16_pro)")
+    parser.add_argument("--target-bytes", type=int, default=DEFAULT_TARGET_BYTES,
+                        help="Per-file byte target, capped at the store limit (default: 2 MiB)")
+    parser.add_argument("--matte", default="#FFFFFF",
+                        help="Color transparent pixels are flattened onto (default: #FFFFFF)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Parallel worker processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    images = args.images
+    if images is None:
+        images = sorted(
+            (os.path.join(args.input_dir, n) for n in os.listdir(args.input_dir)
+             if n.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))),
+            key=_natural_key,
+        )
+    if not images:
+        sys.exit("No images to encode")
+
+    fallback = detect_platform(args.device, args.platform)
+    try:
+        by_prompt = _platforms_from_prompts(args.prompts, images) if args.prompts and args.platform == "auto" else {}
+    except ValueError as e:
+        sys.exit(f"{e} — pass --images in index order, or remove stray files from --input-dir")
+    platforms = [by_prompt.get(img) or fallback for img in images]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(process_file, images, platforms,
+                                [args.target_bytes] * len(images), [args.matte] * len(images),
+                                [args.output_dir] * len(images)))
+
+    name_w = max(20, max(len(os.path.basename(r["file"])) for r in results) + 2)
+    header = f"{'File':<{name_w}} {'Store':<11} {'In KB':>8} {'Out KB':>8} {'Encoding':<20}"
+    sep = '-' * len(header)
+    print(f"\nEncoded {len(results)} screenshots → {args.output_dir}\n")
+    print(sep)
+    print(header)
+    print(sep)
+    failed = 0
+    for r in results:
+        in_kb = f"{r['in_bytes'] / 1024:.0f}" if r["in_bytes"] is not None else "-"
+        out_kb = f"{r['out_bytes'] / 1024:.0f}" if r["out_bytes"] else "-"
+        print(f"{os.path.basename(r['file']):<{name_w}} {r['platform']:<11} {in_kb:>8} "
+              f"{out_kb:>8} {r['encoding']:<20}")
+        for problem in r["problems"]:
+            print(f"    WARNING: {problem}")
+        failed += r["output_file"] is None
+    print(sep)
+    total_in = sum(r["in_bytes"] or 0 for r in results)
+    total_out = sum(r["out_bytes"] or 0 for r in results)
+    print(f"Total {total_in / 1e6:.1f} MB → {total_out / 1e6:.1f} MB\n")
+    if failed:
+        sys.exit(f"{failed} file(s) could not be encoded (byte target or error above)")
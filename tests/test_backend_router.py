@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from backend_router import Router  # noqa: E402
+from backend_simulator import make_server  # noqa: E402
+
+FAST = {"latency_median": 20.0, "latency_sigma": 0.1, "rpm": 0, "time_scale": 0.001, "seed": 1}
+
+
+def _start(configs):
+    servers, backends = [], []
+    for name, config in configs:
+        server = make_server(port=0, config=config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        servers.append(server)
+        backends.append({"name": name, "url": f"http://{host}:{port}"})
+    return servers, backends
+
+
+def _run(configs, screens, hedge_after):
+    servers, backends = _start(configs)
+    router = Router(backends, hedge_after=hedge_after, timeout=10.0)
+    try:
+        results = [router.generate({"prompt": f"screen {i}", "resolution": "8x8"}) for i in range(screens)]
+        return results, {b["backend"]: b for b in router.summary()}
+    finally:
+        router.pool.shutdown(wait=False)
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def test_failing_backend_is_not_kept_as_primary():
+    broken = dict(FAST, error_rate=1.0)
+    results, summary = _run([("broken", broken), ("healthy", FAST)], screens=5, hedge_after=5.0)
+    assert [name for _, name, _ in results] == ["healthy"] * 5
+    assert summary["healthy"]["wins"] == 5
+
+
+def test_backend_that_loses_hedges_learns_it_is_slow():
+    slow = dict(FAST, latency_median=300.0)
+    _, summary = _run([("slow", slow), ("fast", FAST)], screens=15, hedge_after=0.1)
+    # Both start unexplored, so slow (listed first) is primary for screen 1 and
+    # fast wins the hedge. slow's lower bound (>= hedge_after) then outweighs
+    # fast's p50, so fast is primary from screen 2 on and is never hedged to again.
+    assert summary["fast"]["hedges_sent"] == 1
+    assert summary["fast"]["wins"] == 15
+    assert summary["slow"]["wins"] == 0
+    assert summary["slow"]["latency_floor"] >= 0.1